@@ -0,0 +1,116 @@
+"""
+Compares the drivers fetching the approvals available to a user on a workflow with many pending approvals. A throwaway
+test database is created on the database of the given settings, filled in bulk and dropped at the end.
+
+    POSTGRES_HOST=localhost POSTGRES_5432_TCP_PORT=5432 python benchmarks/available_approvals.py --settings settings.with_postgresql
+
+Every object of the workflow gets three pending approvals and only the first of them is actionable, so the default of
+1,000,000 approvals is made of about 333,000 objects.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--settings", default="settings.with_postgresql")
+    parser.add_argument("--approvals", type=int, default=1000000, help="number of the pending approvals to create")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--explain", action="store_true", help="print the query plans of the first pages")
+    args = parser.parse_args()
+
+    os.environ["DJANGO_SETTINGS_MODULE"] = args.settings
+    import django
+    django.setup()
+
+    from django.conf import settings
+    # The settings of the tests keep every query with DEBUG and log every batch of the river.
+    settings.DEBUG = False
+    logging.getLogger("river").setLevel(logging.INFO)
+
+    from django.db import connection
+    old_database_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        run(args)
+    finally:
+        connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+
+def run(args):
+    from django.contrib.contenttypes.models import ContentType
+    from django.db import connection
+
+    from river.driver.orm_driver import OrmDriver
+    from river.driver.sql_driver import SqlDriver
+    from river.models import TransitionApproval, PENDING
+    from river.models.factories import PermissionObjectFactory, UserObjectFactory, GroupObjectFactory
+    from river.tests.models import BasicTestModel
+    from rivertest.flowbuilder import RawState, AuthorizationPolicyBuilder, FlowBuilder
+
+    permission = PermissionObjectFactory()
+    group = GroupObjectFactory()
+    users = {
+        "permitted user": UserObjectFactory(user_permissions=[permission]),
+        "group member": UserObjectFactory(groups=[group]),
+        "unauthorized user": UserObjectFactory(),
+    }
+
+    state1 = RawState("state1")
+    state2 = RawState("state2")
+    state3 = RawState("state3")
+    state4 = RawState("state4")
+    flow = FlowBuilder("my_field", ContentType.objects.get_for_model(BasicTestModel)) \
+        .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(permission).build()]) \
+        .with_transition(state2, state3, [AuthorizationPolicyBuilder().with_group(group).build()]) \
+        .with_transition(state3, state4, [AuthorizationPolicyBuilder().with_permission(permission).with_group(group).build()]) \
+        .with_objects(0) \
+        .build()
+
+    started = time.time()
+    objects_count = args.approvals // 3
+    for offset in range(0, objects_count, args.batch_size):
+        BasicTestModel.objects.bulk_create([BasicTestModel() for _ in range(min(args.batch_size, objects_count - offset))])
+    BasicTestModel.river.my_field.bulk_initialize(BasicTestModel.objects.filter(my_field__isnull=True), batch_size=args.batch_size)
+    if connection.vendor in ["postgresql", "sqlite"]:
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    print("%s pending approvals of %s objects are created in %.1fs on %s" % (
+        TransitionApproval.objects.filter(workflow=flow.workflow, status=PENDING).count(), objects_count, time.time() - started, connection.vendor
+    ))
+
+    drivers = [driver_class(flow.workflow, BasicTestModel, "my_field") for driver_class in [OrmDriver, SqlDriver] if _supports(driver_class)]
+    print("%-20s %-12s %16s %16s" % ("user", "driver", "first page (ms)", "count (ms)"))
+    for user_name, user in users.items():
+        for driver in drivers:
+            first_page = lambda: list(driver.get_available_approvals(as_user=user).order_by("pk").values_list("pk", flat=True)[:args.page_size])
+            count = lambda: driver.get_available_approvals(as_user=user).count()
+            print("%-20s %-12s %16.1f %16.1f" % (user_name, type(driver).__name__, _median_ms(first_page, args.repeat), _median_ms(count, args.repeat)))
+            if args.explain:
+                print(driver.get_available_approvals(as_user=user).order_by("pk").values_list("pk", flat=True)[:args.page_size].explain())
+
+
+def _supports(driver_class):
+    from django.db import connection
+    return driver_class.vendors is None or connection.vendor in driver_class.vendors
+
+
+def _median_ms(query, repeat):
+    durations = []
+    for _ in range(repeat):
+        started = time.time()
+        query()
+        durations.append((time.time() - started) * 1000)
+    return statistics.median(durations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import logging
+
+from river.models import Transition, TransitionApproval, PENDING
+
+LOGGER = logging.getLogger(__name__)
+
+# Keeps the IN lists of the fallback lookups under the parameter limits of the database backends.
+LOOKUP_CHUNK_SIZE = 500
+
+
+class ApprovalMaterializer(object):
+    """
+    Creates the transitions and the transition approvals of workflow objects out of the compiled workflow graph with a
+    fixed number of queries, no matter how many objects or transitions there are.
+    """
+
+    def __init__(self, workflow_graph, content_type, batch_size=None):
+        self.workflow_graph = workflow_graph
+        self.workflow = workflow_graph.workflow
+        self.content_type = content_type
+        self.batch_size = batch_size
+
+    def materialize(self, entries):
+        """
+        Materializes the given ``(object_id, transition_meta, iteration)`` entries where ``transition_meta`` is a node of
+        the workflow graph. The created transitions are returned in the same order.
+        """
+        entries = [(str(object_id), transition_meta, iteration) for object_id, transition_meta, iteration in entries]
+        if not entries:
+            return []
+
+        transitions = self._bulk_create(
+            Transition,
+            [
+                Transition(
+                    workflow=self.workflow,
+                    content_type=self.content_type,
+                    object_id=object_id,
+                    source_state_id=transition_meta.source_state_id,
+                    destination_state_id=transition_meta.destination_state_id,
+                    meta_id=transition_meta.pk,
+                    iteration=iteration,
+                    status=PENDING
+                )
+                for object_id, transition_meta, iteration in entries
+            ],
+            lambda transition: (transition.object_id, transition.meta_id, transition.iteration),
+            ("object_id", set(object_id for object_id, _, _ in entries)),
+            workflow=self.workflow,
+            content_type=self.content_type,
+            status=PENDING
+        )
+
+        model_class = self.content_type.model_class()
+        approval_templates = {}
+        approvals = []
+        for transition, (object_id, transition_meta, _) in zip(transitions, entries):
+            for approval_meta in transition_meta.approval_metas:
+                approval_templates[(transition.pk, approval_meta.pk)] = approval_meta
+                approval = TransitionApproval(
+                    workflow=self.workflow,
+                    content_type=self.content_type,
+                    object_id=object_id,
+                    transition=transition,
+                    priority=approval_meta.priority,
+                    meta_id=approval_meta.pk,
+                    status=PENDING
+                )
+                approval.set_typed_object_id(model_class)
+                approvals.append(approval)
+
+        approvals = self._bulk_create(
+            TransitionApproval,
+            approvals,
+            lambda approval: (approval.transition_id, approval.meta_id),
+            ("transition_id", [transition.pk for transition in transitions])
+        )
+
+        permissions = []
+        groups = []
+        for approval in approvals:
+            approval_meta = approval_templates[(approval.transition_id, approval.meta_id)]
+            permissions.extend(
+                TransitionApproval.permissions.through(transitionapproval_id=approval.pk, permission_id=permission_id)
+                for permission_id in approval_meta.permission_ids
+            )
+            groups.extend(
+                TransitionApproval.groups.through(transitionapproval_id=approval.pk, group_id=group_id)
+                for group_id in approval_meta.group_ids
+            )
+        if permissions:
+            TransitionApproval.permissions.through.objects.bulk_create(permissions, batch_size=self.batch_size)
+        if groups:
+            TransitionApproval.groups.through.objects.bulk_create(groups, batch_size=self.batch_size)
+
+        LOGGER.debug("%s transitions and %s transition approvals are materialized for the workflow %s" % (len(transitions), len(approvals), self.workflow))
+        return transitions
+
+    def _bulk_create(self, model, objects, key, chunked_lookup, **lookup):
+        if not objects:
+            return []
+
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        if all(obj.pk is not None for obj in created):
+            return created
+
+        # Not every database backend returns the primary keys of the rows inserted in bulk.
+        # The latest rows matching the natural keys are the ones just inserted. The natural
+        # keys contain the chunked field, so the rows of a key are always read in one chunk.
+        field, values = chunked_lookup
+        values = sorted(values)
+        by_key = {}
+        for index in range(0, len(values), LOOKUP_CHUNK_SIZE):
+            for obj in model.objects.filter(**{"%s__in" % field: values[index:index + LOOKUP_CHUNK_SIZE]}, **lookup).order_by("pk"):
+                by_key[key(obj)] = obj
+        return [by_key[key(obj)] for obj in objects]
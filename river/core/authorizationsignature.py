@@ -0,0 +1,190 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_save, post_delete
+
+from river.config import app_config
+
+AuthorizationSignature = namedtuple("AuthorizationSignature", ["permission_ids", "group_ids"])
+
+
+class AuthorizationSignatureCache(object):
+    """
+    Resolves the ids of the permissions a user has through the authentication backends and the ids of the groups the user
+    is in. A resolved signature is kept on the user object, so it is computed once per request, and in the cache named by
+    ``RIVER_CACHE_ALIAS`` when it is set. The cached signatures are expired whenever the permissions or the groups of their
+    users change.
+    """
+
+    def get(self, user):
+        signature = getattr(user, "_river_authorization_signature", None)
+        if signature is None:
+            shared_cache = self._shared_cache
+            cached = shared_cache.get(_signature_key(user.pk)) if shared_cache else None
+            if cached is not None:
+                signature = AuthorizationSignature(*cached)
+            else:
+                signature = self._resolve(user)
+                if shared_cache:
+                    shared_cache.set(_signature_key(user.pk), tuple(signature))
+            user._river_authorization_signature = signature
+        return signature
+
+    def get_many(self, users):
+        """
+        Signatures of the given users by their ids. The ones which are not cached yet are resolved in bulk with a few
+        queries when all the authentication backends resolve the permissions like Django's ``ModelBackend`` does, and one
+        by one otherwise.
+        """
+        signatures = {}
+        missing = []
+        for user in users:
+            signature = getattr(user, "_river_authorization_signature", None)
+            if signature is None:
+                missing.append(user)
+            else:
+                signatures[user.pk] = signature
+
+        shared_cache = self._shared_cache
+        if shared_cache and missing:
+            cached = shared_cache.get_many([_signature_key(user.pk) for user in missing])
+            for user in list(missing):
+                if _signature_key(user.pk) in cached:
+                    user._river_authorization_signature = AuthorizationSignature(*cached[_signature_key(user.pk)])
+                    signatures[user.pk] = user._river_authorization_signature
+                    missing.remove(user)
+
+        if missing:
+            if all(_resolves_like_model_backend(backend) for backend in auth.get_backends()):
+                resolved = self._resolve_many(missing)
+            else:
+                resolved = {user.pk: self._resolve(user) for user in missing}
+            for user in missing:
+                user._river_authorization_signature = resolved[user.pk]
+                signatures[user.pk] = resolved[user.pk]
+            if shared_cache:
+                shared_cache.set_many({_signature_key(user_id): tuple(signature) for user_id, signature in resolved.items()})
+
+        return signatures
+
+    def expire(self, *user_ids):
+        shared_cache = self._shared_cache
+        if shared_cache and user_ids:
+            signature_keys = [_signature_key(user_id) for user_id in user_ids]
+            shared_cache.delete_many(signature_keys)
+            transaction.on_commit(lambda: shared_cache.delete_many(signature_keys))
+
+    @staticmethod
+    def _resolve(user):
+        permission_q = Q()
+        for backend in auth.get_backends():
+            for permission in backend.get_all_permissions(user):
+                label, codename = permission.split('.')
+                permission_q = permission_q | Q(content_type__app_label=label, codename=codename)
+        permission_ids = list(app_config.PERMISSION_CLASS.objects.filter(permission_q).values_list("pk", flat=True).order_by("pk")) if permission_q else []
+        group_ids = list(user.groups.values_list("pk", flat=True).order_by("pk"))
+        return AuthorizationSignature(permission_ids, group_ids)
+
+    @staticmethod
+    def _resolve_many(users):
+        user_model = auth.get_user_model()
+        user_ids = [user.pk for user in users]
+        groups_field = user_model._meta.get_field("groups")
+        user_permissions_field = user_model._meta.get_field("user_permissions")
+
+        group_ids = {}
+        for user_id, group_id in groups_field.remote_field.through.objects.filter(**{"%s__in" % groups_field.m2m_field_name(): user_ids}).values_list(
+                groups_field.m2m_column_name(), groups_field.m2m_reverse_name()):
+            group_ids.setdefault(user_id, set()).add(group_id)
+
+        permission_ids = {}
+        for user_id, permission_id in user_permissions_field.remote_field.through.objects.filter(**{"%s__in" % user_permissions_field.m2m_field_name(): user_ids}).values_list(
+                user_permissions_field.m2m_column_name(), user_permissions_field.m2m_reverse_name()):
+            permission_ids.setdefault(user_id, set()).add(permission_id)
+
+        group_permission_ids = {}
+        all_group_ids = set().union(*group_ids.values()) if group_ids else set()
+        for group_id, permission_id in app_config.GROUP_CLASS.permissions.through.objects.filter(group_id__in=all_group_ids).values_list("group_id", "permission_id"):
+            group_permission_ids.setdefault(group_id, set()).add(permission_id)
+
+        all_permission_ids = None
+        signatures = {}
+        for user in users:
+            if not user.is_active:
+                user_permission_ids = set()
+            elif user.is_superuser:
+                if all_permission_ids is None:
+                    all_permission_ids = set(app_config.PERMISSION_CLASS.objects.order_by().values_list("pk", flat=True))
+                user_permission_ids = all_permission_ids
+            else:
+                user_permission_ids = set(permission_ids.get(user.pk, set()))
+                for group_id in group_ids.get(user.pk, set()):
+                    user_permission_ids.update(group_permission_ids.get(group_id, set()))
+            signatures[user.pk] = AuthorizationSignature(sorted(user_permission_ids), sorted(group_ids.get(user.pk, set())))
+        return signatures
+
+    @property
+    def _shared_cache(self):
+        return caches[app_config.CACHE_ALIAS] if app_config.CACHE_ALIAS else None
+
+
+def _resolves_like_model_backend(backend):
+    # A subclass of ModelBackend may grant more permissions than the ones assigned to the user and the user's groups.
+    return isinstance(backend, ModelBackend) and all(
+        getattr(type(backend), name, None) is getattr(ModelBackend, name, None)
+        for name in ["get_all_permissions", "get_user_permissions", "get_group_permissions", "_get_permissions", "_get_user_permissions", "_get_group_permissions"]
+    )
+
+
+def _signature_key(user_id):
+    return "river:authorization_signature:%s" % user_id
+
+
+authorization_signature_cache = AuthorizationSignatureCache()
+
+
+def _forget(user):
+    user.__dict__.pop("_river_authorization_signature", None)
+    authorization_signature_cache.expire(user.pk)
+
+
+def _on_user_changed(sender, instance, *args, **kwargs):
+    _forget(instance)
+
+
+def _on_user_authorization_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    if action not in ["post_add", "post_remove", "pre_clear"]:
+        return
+
+    if not reverse:
+        _forget(instance)
+    elif action == "pre_clear":
+        authorization_signature_cache.expire(*instance.user_set.values_list("pk", flat=True))
+    else:
+        authorization_signature_cache.expire(*(pk_set or []))
+
+
+def _on_group_permissions_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    if action not in ["post_add", "post_remove", "pre_clear"] or not app_config.CACHE_ALIAS:
+        return
+
+    users = auth.get_user_model()._default_manager.all()
+    if not reverse:
+        users = users.filter(groups=instance)
+    elif action == "pre_clear":
+        users = users.filter(groups__permissions=instance)
+    else:
+        users = users.filter(groups__in=pk_set or [])
+    authorization_signature_cache.expire(*users.values_list("pk", flat=True).distinct())
+
+
+post_save.connect(_on_user_changed, sender=settings.AUTH_USER_MODEL)
+post_delete.connect(_on_user_changed, sender=settings.AUTH_USER_MODEL)
+m2m_changed.connect(_on_user_authorization_changed, sender=settings.AUTH_USER_MODEL + "_groups")
+m2m_changed.connect(_on_user_authorization_changed, sender=settings.AUTH_USER_MODEL + "_user_permissions")
+m2m_changed.connect(_on_group_permissions_changed, sender=app_config.GROUP_CLASS.permissions.through)
@@ -1,8 +1,36 @@
+import base64
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import transaction, connection
+from django.db.models import QuerySet, Exists, OuterRef, CharField, Q, Count, Subquery, prefetch_related_objects, Case, When, Value, BooleanField, Min
+from django.db.models.functions import Cast
+from django.utils import timezone
 
-from river.driver.mssql_driver import MsSqlDriver
+from river.core.approvalmaterializer import ApprovalMaterializer
+from river.core.authorizationsignature import authorization_signature_cache
+from river.core.instanceworkflowobject import pick_approval
+from river.core.workflowgraph import workflow_graph_cache
 from river.driver.orm_driver import OrmDriver
-from river.models import State, TransitionApprovalMeta, Workflow, app_config, TransitionMeta
+from river.driver.sql_driver import SqlDriver
+from river.models import State, TransitionApproval, Transition, InboxEntry, PENDING, APPROVED, DONE, JUMPED, CANCELLED, app_config
+from river.signals import ApproveSignal, TransitionSignal, OnCompleteSignal, PrefetchedHooks
+from river.utils.error_code import ErrorCode
+from river.utils.exceptions import RiverException
+
+LOGGER = logging.getLogger(__name__)
+
+ApprovalPage = namedtuple("ApprovalPage", ["approvals", "cursor"])
+ApprovalResult = namedtuple("ApprovalResult", ["workflow_object", "approval", "error"])
+PrefetchedWorkflowStatus = namedtuple(
+    "PrefetchedWorkflowStatus", ["class_workflow", "as_user_id", "state_id", "available_states", "next_approvals", "recent_approval"]
+)
 
 
 class ClassWorkflowObject(object):
@@ -10,41 +38,619 @@ class ClassWorkflowObject(object):
     def __init__(self, wokflow_object_class, field_name):
         self.wokflow_object_class = wokflow_object_class
         self.field_name = field_name
-        self.workflow = Workflow.objects.filter(field_name=self.field_name, content_type=self._content_type).first()
+        self.workflow_graph = workflow_graph_cache.get(self._content_type, self.field_name)
+        self.workflow = self.workflow_graph.workflow if self.workflow_graph else None
         self._cached_river_driver = None
 
+    @property
+    def _river_driver_class(self):
+        return SqlDriver if connection.vendor in SqlDriver.vendors else OrmDriver
+
     @property
     def _river_driver(self):
-        if self._cached_river_driver:
-            return self._cached_river_driver
-        else:
-            if app_config.IS_MSSQL:
-                self._cached_river_driver = MsSqlDriver(self.workflow, self.wokflow_object_class, self.field_name)
-            else:
-                self._cached_river_driver = OrmDriver(self.workflow, self.wokflow_object_class, self.field_name)
-            return self._cached_river_driver
+        if not self._cached_river_driver:
+            self._cached_river_driver = self._river_driver_class(self.workflow, self.wokflow_object_class, self.field_name)
+        return self._cached_river_driver
 
     def get_on_approval_objects(self, as_user):
+        """
+        The model objects waiting for the user's approval as a lazy queryset. The approvals are embedded into it as a
+        subquery, so it can be ordered, sliced and paginated without fetching their object ids first.
+        """
+        return self.filter_awaiting(self.wokflow_object_class.objects.all(), as_user)
+
+    def filter_awaiting(self, queryset, as_user):
+        """
+        Narrows the given queryset of the model down to the objects waiting for the user's approval with a subquery.
+        """
+        # Exists is annotated before being filtered on, since it can only be filtered on directly from Django 3.0 on.
+        if app_config.INBOX_ENABLED:
+            entries = InboxEntry.objects.entries_for(self.workflow, as_user)
+            awaiting = Exists(entries.filter(object_id=Cast(OuterRef("pk"), output_field=CharField())))
+            return queryset.annotate(_river_awaiting=awaiting).filter(_river_awaiting=True)
+
         approvals = self.get_available_approvals(as_user)
-        object_ids = list(approvals.values_list('object_id', flat=True))
-        return self.wokflow_object_class.objects.filter(pk__in=object_ids)
+        typed_object_id_field = TransitionApproval.typed_object_id_field(self.wokflow_object_class)
+        if typed_object_id_field:
+            return queryset.filter(pk__in=approvals.values(typed_object_id_field))
+        return queryset.annotate(_river_awaiting=Exists(self._correlated(approvals))).filter(_river_awaiting=True)
+
+    def filter_awaiting_group(self, queryset, group):
+        """
+        Narrows the given queryset of the model down to the objects having an actionable approval restricted to the group.
+        """
+        approvals = TransitionApproval.objects.filter(workflow=self.workflow, status=PENDING, actionable=True, groups=group)
+        return queryset.annotate(_river_awaiting_group=Exists(self._correlated(approvals))).filter(_river_awaiting_group=True)
+
+    def annotate_is_final(self, queryset, name="is_final"):
+        """
+        Annotates the given queryset of the model with whether the objects are on a final state of the workflow.
+        """
+        final_state_ids = self.workflow_graph.final_state_ids if self.workflow_graph else []
+        state_attname = self.wokflow_object_class._meta.get_field(self.field_name).attname
+        return queryset.annotate(**{
+            name: Case(When(Q(**{"%s__in" % state_attname: list(final_state_ids)}), then=Value(True)), default=Value(False), output_field=BooleanField())
+        })
+
+    def annotate_last_transaction_date(self, queryset, name="last_transaction_date"):
+        """
+        Annotates the given queryset of the model with the date of the latest approval of the objects in the workflow.
+        """
+        approvals = TransitionApproval.objects.filter(workflow=self.workflow, transaction_date__isnull=False)
+        return queryset.annotate(**{name: Subquery(self._correlated(approvals).order_by("-transaction_date").values("transaction_date")[:1])})
+
+    def get_inbox(self, as_user, after=None, limit=None):
+        """
+        The model objects waiting for the user's approval, read from the inbox entries and ordered by their ids. The next
+        page is fetched by passing the primary key of the last object of the previous page as ``after``.
+        """
+        object_ids = InboxEntry.objects.object_ids_for(self.workflow, as_user, after=after, limit=limit)
+        workflow_objects = {str(pk): workflow_object for pk, workflow_object in self.wokflow_object_class._default_manager.in_bulk(object_ids).items()}
+        return [workflow_objects[object_id] for object_id in object_ids if object_id in workflow_objects]
+
+    def rebuild_inbox(self):
+        InboxEntry.objects.rebuild(self.workflow)
 
     def get_available_approvals(self, as_user):
         return self._river_driver.get_available_approvals(as_user)
 
+    def prefetch(self, workflow_objects, as_user=None):
+        """
+        Computes the states, the available states for the user, the next approvals and the recent approvals of the given
+        workflow objects with a constant number of queries and attaches them to the objects. The instance API of those
+        objects reads them from there instead of querying them object by object, until the state of the object changes.
+        """
+        workflow_objects = list(workflow_objects)
+        if not workflow_objects or not self.workflow:
+            return workflow_objects
+
+        prefetch_related_objects(workflow_objects, self.field_name)
+        state_attname = self.wokflow_object_class._meta.get_field(self.field_name).attname
+        object_ids = [str(workflow_object.pk) for workflow_object in workflow_objects]
+
+        available_state_ids = {}
+        if as_user:
+            for object_id, state_id in self.get_available_approvals(as_user).filter(object_id__in=object_ids).values_list("object_id", "transition__destination_state"):
+                available_state_ids.setdefault(object_id, set()).add(state_id)
+
+        object_ids_by_state = {}
+        for workflow_object in workflow_objects:
+            object_ids_by_state.setdefault(getattr(workflow_object, state_attname), []).append(str(workflow_object.pk))
+        next_approvals = {}
+        next_approvals_q = [
+            Q(transition__object_id__in=state_object_ids, transition__source_state_id=state_id)
+            for state_id, state_object_ids in object_ids_by_state.items() if state_id is not None
+        ]
+        if next_approvals_q:
+            for approval in TransitionApproval.objects.filter(Q(transition__workflow=self.workflow) & reduce(or_, next_approvals_q)).order_by("pk"):
+                next_approvals.setdefault(approval.object_id, []).append(approval)
+
+        recent_approvals = {approval.object_id: approval for approval in self._recent_approvals(object_ids)}
+
+        for workflow_object in workflow_objects:
+            object_id = str(workflow_object.pk)
+            workflow_object.__dict__.setdefault("_river_prefetched", {})[self.field_name] = PrefetchedWorkflowStatus(
+                class_workflow=self,
+                as_user_id=as_user.pk if as_user else None,
+                state_id=getattr(workflow_object, state_attname),
+                available_states=[self.workflow_graph.states[state_id] for state_id in sorted(available_state_ids.get(object_id, []))],
+                next_approvals=next_approvals.get(object_id, []),
+                recent_approval=recent_approvals.get(object_id),
+            )
+        return workflow_objects
+
+    def get_available_approval_ids_by_user(self, as_users):
+        """
+        Ids of the approvals available to each of the given users, for the jobs going through many users at once. The
+        actionable approvals of the workflow and their permission and group restrictions are streamed with three queries
+        and matched against the authorization signatures of the users, which are resolved in bulk, instead of querying
+        the approvals per user.
+        """
+        as_users = list(as_users)
+        signatures = authorization_signature_cache.get_many(as_users)
+
+        # The restrictions are read table by table; joining both many to many tables at once would return a row per
+        # permission and group pair of every approval.
+        approvals = TransitionApproval.objects.filter(workflow=self.workflow, status=PENDING, actionable=True)
+        restrictions = {
+            approval_id: (transactioner_id, set(), set())
+            for approval_id, transactioner_id in approvals.values_list("pk", "transactioner_id").iterator()
+        }
+        for index, field_name in enumerate(["permissions", "groups"], start=1):
+            field = TransitionApproval._meta.get_field(field_name)
+            for approval_id, restriction_id in field.remote_field.through.objects.filter(**{"%s__in" % field.m2m_field_name(): approvals.values("pk")}).values_list(
+                    field.m2m_column_name(), field.m2m_reverse_name()).iterator():
+                if approval_id in restrictions:
+                    restrictions[approval_id][index].add(restriction_id)
+
+        unrestricted, by_transactioner, by_permission, by_group = set(), {}, {}, {}
+        for approval_id, (transactioner_id, permission_ids, group_ids) in restrictions.items():
+            if transactioner_id:
+                by_transactioner.setdefault(transactioner_id, set()).add(approval_id)
+            elif permission_ids:
+                for permission_id in permission_ids:
+                    by_permission.setdefault(permission_id, set()).add(approval_id)
+            elif group_ids:
+                for group_id in group_ids:
+                    by_group.setdefault(group_id, set()).add(approval_id)
+            else:
+                unrestricted.add(approval_id)
+
+        approval_ids_by_user = {}
+        for user in as_users:
+            signature = signatures[user.pk]
+            user_permission_ids, user_group_ids = set(signature.permission_ids), set(signature.group_ids)
+            candidates = set(unrestricted) | by_transactioner.get(user.pk, set())
+            for permission_id in user_permission_ids:
+                candidates |= by_permission.get(permission_id, set())
+            for group_id in user_group_ids:
+                candidates |= by_group.get(group_id, set())
+            approval_ids_by_user[user] = sorted(
+                approval_id
+                for approval_id in candidates
+                if _is_authorized(restrictions[approval_id], user.pk, user_permission_ids, user_group_ids)
+            )
+        return approval_ids_by_user
+
+    def count_on_approval_objects(self, as_user, cache_timeout=None):
+        """
+        Numbers of the model objects waiting for the user's approval by their current states, counted in one grouped
+        query. When ``cache_timeout`` is given and ``RIVER_CACHE_ALIAS`` is set, the counts are kept in that cache for that
+        many seconds under a key made of the workflow, the user and the user's authorization signature.
+        """
+        if not self.workflow:
+            return {}
+
+        shared_cache = caches[app_config.CACHE_ALIAS] if app_config.CACHE_ALIAS and cache_timeout else None
+        counts = None
+        if shared_cache:
+            cache_key = _counts_key(self.workflow, as_user)
+            counts = shared_cache.get(cache_key)
+        if counts is None:
+            counts = list(
+                self.get_available_approvals(as_user)
+                    .order_by()
+                    .values_list("transition__source_state")
+                    .annotate(count=Count("object_id", distinct=True))
+            )
+            if shared_cache:
+                shared_cache.set(cache_key, counts, cache_timeout)
+        return {self.workflow_graph.states[state_id]: count for state_id, count in counts}
+
+    def iter_available_approvals(self, as_user, page_size=100, after=None):
+        """
+        Walks the approvals available to the user page by page, ordered by their priorities, object ids and ids. Every page
+        is fetched with a keyset condition instead of an offset, so each one costs the same. The generator yields
+        ``ApprovalPage`` tuples; the ``cursor`` of a page can be passed as ``after`` later on to resume right after it.
+        """
+        approvals = self.get_available_approvals(as_user).distinct().order_by("priority", "object_id", "pk")
+        position = _decode_cursor(after) if after else None
+        while True:
+            page = approvals
+            if position:
+                priority, object_id, pk = position
+                page = page.filter(
+                    Q(priority__gt=priority) |
+                    Q(priority=priority, object_id__gt=object_id) |
+                    Q(priority=priority, object_id=object_id, pk__gt=pk)
+                )
+            page = list(page[:page_size])
+            if not page:
+                return
+            position = (page[-1].priority, page[-1].object_id, page[-1].pk)
+            yield ApprovalPage(page, _encode_cursor(position))
+            if len(page) < page_size:
+                return
+
+    @transaction.atomic
+    def approve_many(self, workflow_objects, as_user, next_state=None):
+        """
+        Approves the given workflow objects on behalf of the user at once. The available approvals of all the objects are
+        validated with one query, the approvals and the transitions are updated in bulk and the new states are written
+        with one ``UPDATE`` per destination state, so only the state fields of the objects are saved. The hooks are fired
+        object by object in the given order. An ``ApprovalResult`` is returned for every object in the same order; the
+        objects which can not be approved get the error instead of failing the others. Nothing is returned when the model
+        has no workflow yet.
+        """
+        workflow_objects = list(workflow_objects)
+        if not workflow_objects or not self.workflow:
+            return []
+
+        object_ids = [str(workflow_object.pk) for workflow_object in workflow_objects]
+
+        available_approvals = {}
+        for approval in TransitionApproval.objects \
+                .select_for_update() \
+                .select_related("transition__source_state", "transition__destination_state") \
+                .filter(pk__in=self.get_available_approvals(as_user).filter(object_id__in=object_ids).values("pk")) \
+                .order_by("pk"):
+            available_approvals.setdefault(approval.object_id, []).append(approval)
+
+        results = []
+        for workflow_object, object_id in zip(workflow_objects, object_ids):
+            workflow_object.__dict__.get("_river_prefetched", {}).pop(self.field_name, None)
+            try:
+                results.append(ApprovalResult(workflow_object, pick_approval(available_approvals.get(object_id, []), next_state), None))
+            except RiverException as e:
+                results.append(ApprovalResult(workflow_object, None, e))
+        approved = [result for result in results if result.approval]
+        if not approved:
+            return results
+
+        recent_approval_ids = dict(self._recent_approvals([str(result.workflow_object.pk) for result in approved]).values_list("object_id", "pk"))
+        now = timezone.now()
+        for workflow_object, approval, _ in approved:
+            approval.status = APPROVED
+            approval.actionable = False
+            approval.transactioner = as_user
+            approval.transaction_date = now
+            approval.date_updated = now
+            approval.previous_id = recent_approval_ids.get(approval.object_id)
+        TransitionApproval.objects.bulk_update(
+            [approval for _, approval, _ in approved], ["status", "actionable", "transactioner", "transaction_date", "date_updated", "previous"]
+        )
+
+        if next_state:
+            self.cancel_impossible_futures([approval for _, approval, _ in approved])
+
+        transition_ids = [approval.transition_id for _, approval, _ in approved]
+        blocked_transition_ids = set(TransitionApproval.objects.filter(transition_id__in=transition_ids, status=PENDING).values_list("transition_id", flat=True))
+        transited = [result for result in approved if result.approval.transition_id not in blocked_transition_ids]
+        if transited:
+            Transition.objects.filter(pk__in=[approval.transition_id for _, approval, _ in transited]).update(status=DONE, date_updated=now)
+            for workflow_object, approval, _ in transited:
+                approval.transition.status = DONE
+                setattr(workflow_object, self.field_name, approval.transition.destination_state)
+            self._materialize_next_transitions([approval.transition for _, approval, _ in transited])
+
+        state_attname = self.wokflow_object_class._meta.get_field(self.field_name).attname
+        TransitionApproval.objects.refresh_actionable(
+            self.workflow, {workflow_object.pk: getattr(workflow_object, state_attname) for workflow_object, _, _ in approved}
+        )
+
+        transited_ids = {str(workflow_object.pk) for workflow_object, _, _ in transited}
+        hooks = PrefetchedHooks(self.workflow, self._content_type, [workflow_object.pk for workflow_object, _, _ in approved])
+        signals = []
+        for workflow_object, approval, _ in approved:
+            has_transit = str(workflow_object.pk) in transited_ids
+            on_final_state = getattr(workflow_object, state_attname) in self.workflow_graph.final_state_ids
+            object_signals = [
+                ApproveSignal(workflow_object, self.field_name, approval, workflow=self.workflow, hooks=hooks),
+                TransitionSignal(has_transit, workflow_object, self.field_name, approval, workflow=self.workflow, hooks=hooks),
+                OnCompleteSignal(workflow_object, self.field_name, workflow=self.workflow, status=on_final_state, hooks=hooks),
+            ]
+            for signal in object_signals:
+                signal.__enter__()
+            signals.append(object_signals)
+
+        object_ids_by_state = {}
+        for workflow_object, approval, _ in transited:
+            object_ids_by_state.setdefault(approval.transition.destination_state, []).append(workflow_object.pk)
+        for state, state_object_ids in object_ids_by_state.items():
+            self.wokflow_object_class._default_manager.filter(pk__in=state_object_ids).update(**{self.field_name: state})
+
+        for object_signals in signals:
+            for signal in reversed(object_signals):
+                signal.__exit__(None, None, None)
+
+        LOGGER.debug("%s of %s workflow objects are approved by %s for the workflow %s" % (len(approved), len(results), as_user, self.workflow))
+        return results
+
+    @transaction.atomic
+    def cancel_impossible_futures(self, approved_approvals):
+        """
+        Cancels the pending transitions of the objects of the given approvals which can not be reached anymore from the
+        destination states of their transitions. The pending transitions of all the objects are read with one query and
+        walked in memory, then the unreachable ones are cancelled with two ``UPDATE`` statements.
+        """
+        approved_approvals = list(approved_approvals)
+        pending_transitions = {}
+        for pk, object_id, source_state_id, destination_state_id, iteration in Transition.objects.filter(
+                workflow=self.workflow,
+                object_id__in={str(approval.object_id) for approval in approved_approvals},
+                status=PENDING
+        ).values_list("pk", "object_id", "source_state_id", "destination_state_id", "iteration"):
+            pending_transitions.setdefault(object_id, []).append((pk, source_state_id, destination_state_id, iteration))
+
+        cancelled_transition_ids = []
+        for approval in approved_approvals:
+            transition = approval.transition
+            object_transitions = pending_transitions.get(str(approval.object_id), [])
+            outgoing = {}
+            for pk, source_state_id, destination_state_id, _ in object_transitions:
+                outgoing.setdefault(source_state_id, []).append((pk, destination_state_id))
+
+            possible_transition_ids = {transition.pk}
+            visited_state_ids = {transition.destination_state_id}
+            possible_next_state_ids = [transition.destination_state_id]
+            while possible_next_state_ids:
+                for pk, destination_state_id in outgoing.get(possible_next_state_ids.pop(), []):
+                    possible_transition_ids.add(pk)
+                    if destination_state_id not in visited_state_ids:
+                        visited_state_ids.add(destination_state_id)
+                        possible_next_state_ids.append(destination_state_id)
+
+            cancelled_transition_ids.extend(
+                pk for pk, _, _, iteration in object_transitions if iteration >= transition.iteration and pk not in possible_transition_ids
+            )
+
+        if cancelled_transition_ids:
+            cancelled_approvals = TransitionApproval.objects.filter(transition_id__in=cancelled_transition_ids)
+            if app_config.INBOX_ENABLED:
+                InboxEntry.objects.filter(transition_approval__in=cancelled_approvals).delete()
+            cancelled_approvals.update(status=CANCELLED, actionable=False)
+            Transition.objects.filter(pk__in=cancelled_transition_ids).update(status=CANCELLED)
+
+    def jump_many(self, workflow_objects, state, batch_size=1000):
+        """
+        Jumps the given workflow objects to the state like ``jump_to`` does, batch by batch. The transitions and the
+        approvals jumped over are marked with a few ``UPDATE`` statements per batch and the new state is written with one.
+        The objects which can not jump to the state are left as they are. Returns the number of the jumped objects.
+        """
+        if not self.workflow:
+            return 0
+
+        jumped = 0
+        for batch in self._batches_of(workflow_objects, batch_size):
+            jumped += self._jump_batch(batch, state)
+        LOGGER.debug("%s workflow objects are jumped to the state %s for the workflow %s" % (jumped, state, self.workflow))
+        return jumped
+
+    def cancel_many(self, workflow_objects, batch_size=1000):
+        """
+        Cancels the pending transitions and approvals of the given workflow objects batch by batch with a few ``UPDATE``
+        statements each, so nothing is waiting for an approval on them anymore. Their states are left as they are.
+        Returns the number of the cancelled transitions.
+        """
+        if not self.workflow:
+            return 0
+
+        cancelled = 0
+        for batch in self._batches_of(workflow_objects, batch_size):
+            cancelled += self._cancel_batch(batch)
+        LOGGER.debug("%s transitions are cancelled for the workflow %s" % (cancelled, self.workflow))
+        return cancelled
+
+    def bulk_initialize(self, workflow_objects, batch_size=1000):
+        """
+        Initializes the workflow objects which are created without triggering the model signals, e.g. by ``bulk_create``.
+        The objects are processed in batches; each batch gets its initial state with one ``UPDATE`` and its transitions
+        and approvals in a few multi-row inserts. A queryset is streamed batch by batch so the memory use stays flat.
+        """
+        if not self.workflow:
+            return 0
+
+        initialized = 0
+        for batch in self._batches_of(workflow_objects, batch_size):
+            initialized += self._initialize_batch(batch, batch_size)
+        LOGGER.debug("%s workflow objects are initialized for the workflow %s" % (initialized, self.workflow))
+        return initialized
+
+    @transaction.atomic
+    def _initialize_batch(self, batch, batch_size):
+        object_ids = [object_id for object_id, _, _ in batch]
+        initialized_object_ids = set(
+            TransitionApproval.objects.filter(
+                workflow=self.workflow,
+                content_type=self._content_type,
+                object_id__in=[str(object_id) for object_id in object_ids]
+            ).values_list("object_id", flat=True).distinct()
+        )
+        uninitialized = [(object_id, state_id) for object_id, state_id, _ in batch if str(object_id) not in initialized_object_ids]
+
+        ApprovalMaterializer(self.workflow_graph, self._content_type, batch_size=batch_size).materialize(
+            (object_id, transition_meta, iteration)
+            for object_id, state_id in uninitialized
+            for transition_meta, iteration in self.workflow_graph.initial_transitions(state_id)
+        )
+
+        initial_state = self.initial_state
+        self.wokflow_object_class._default_manager.filter(pk__in=object_ids, **{"%s__isnull" % self.field_name: True}).update(**{self.field_name: initial_state})
+        for _, state_id, workflow_object in batch:
+            if workflow_object is not None and state_id is None:
+                setattr(workflow_object, self.field_name, initial_state)
+
+        TransitionApproval.objects.refresh_actionable(
+            self.workflow, {object_id: state_id or self.workflow_graph.initial_state_id for object_id, state_id in uninitialized}
+        )
+
+        return len(uninitialized)
+
+    @transaction.atomic
+    def _jump_batch(self, batch, state):
+        if self.workflow.lazy_approvals:
+            jumped_object_ids = self._jump_lazily(batch, state)
+        else:
+            recent_iterations = dict(
+                self._recent_approvals([str(object_id) for object_id, _, _ in batch]).values_list("object_id", "transition__iteration")
+            )
+            jumped_iterations = {}
+            for object_id, iteration in Transition.objects.filter(
+                    workflow=self.workflow, object_id__in=[str(object_id) for object_id, _, _ in batch], destination_state=state, status=PENDING
+            ).values_list("object_id", "iteration"):
+                if iteration >= recent_iterations.get(object_id, 0):
+                    jumped_iterations[object_id] = min(iteration, jumped_iterations.get(object_id, iteration))
+
+            object_ids_by_iteration = {}
+            for object_id, iteration in jumped_iterations.items():
+                object_ids_by_iteration.setdefault(iteration, []).append(object_id)
+            now = timezone.now()
+            for iteration, object_ids in object_ids_by_iteration.items():
+                jumped_transitions = Transition.objects.filter(workflow=self.workflow, object_id__in=object_ids, iteration__lte=iteration, status=PENDING)
+                TransitionApproval.objects.filter(transition__in=jumped_transitions).update(status=JUMPED, actionable=False, date_updated=now)
+                jumped_transitions.update(status=JUMPED, date_updated=now)
+            jumped_object_ids = set(jumped_iterations)
+
+        jumped_batch = [(object_id, workflow_object) for object_id, _, workflow_object in batch if str(object_id) in jumped_object_ids]
+        if jumped_batch:
+            self.wokflow_object_class._default_manager.filter(pk__in=[object_id for object_id, _ in jumped_batch]).update(**{self.field_name: state})
+            for _, workflow_object in jumped_batch:
+                if workflow_object is not None:
+                    setattr(workflow_object, self.field_name, state)
+                    workflow_object.__dict__.get("_river_prefetched", {}).pop(self.field_name, None)
+            TransitionApproval.objects.refresh_actionable(self.workflow, {object_id: state.pk for object_id, _ in jumped_batch})
+        return len(jumped_batch)
+
+    def _jump_lazily(self, batch, state):
+        levels = {str(object_id): self.workflow_graph.level_of(state_id, state.pk) for object_id, state_id, _ in batch}
+        state_ids = {str(object_id): state_id for object_id, state_id, _ in batch if levels[str(object_id)] is not None}
+        if not state_ids:
+            return set()
+
+        pending_transitions = Transition.objects.filter(workflow=self.workflow, object_id__in=list(state_ids), status=PENDING)
+        iterations = {}
+        for object_id, source_state_id, iteration in pending_transitions.order_by().values_list("object_id", "source_state_id").annotate(iteration=Min("iteration")):
+            if source_state_id == state_ids[object_id]:
+                iterations[object_id] = iteration
+
+        now = timezone.now()
+        TransitionApproval.objects.filter(transition__in=pending_transitions, status=PENDING).update(status=JUMPED, actionable=False, date_updated=now)
+        pending_transitions.update(status=JUMPED, date_updated=now)
+        ApprovalMaterializer(self.workflow_graph, self._content_type).materialize(
+            (object_id, transition_meta, iterations.get(object_id, self.workflow_graph.depths.get(state_id, 0)) + levels[object_id] + 1)
+            for object_id, state_id in state_ids.items()
+            for transition_meta in self.workflow_graph.outgoing.get(state.pk, ())
+        )
+        return set(state_ids)
+
+    @transaction.atomic
+    def _cancel_batch(self, batch):
+        object_ids = [str(object_id) for object_id, _, _ in batch]
+        cancelled_transitions = Transition.objects.filter(workflow=self.workflow, object_id__in=object_ids, status=PENDING)
+        cancelled_approvals = TransitionApproval.objects.filter(transition__in=cancelled_transitions, status=PENDING)
+        if app_config.INBOX_ENABLED:
+            InboxEntry.objects.filter(transition_approval__in=cancelled_approvals).delete()
+        now = timezone.now()
+        cancelled_approvals.update(status=CANCELLED, actionable=False, date_updated=now)
+        return cancelled_transitions.update(status=CANCELLED, date_updated=now)
+
+    def _batches_of(self, workflow_objects, batch_size):
+        state_attname = self.wokflow_object_class._meta.get_field(self.field_name).attname
+        if isinstance(workflow_objects, QuerySet):
+            queryset = workflow_objects.order_by("pk")
+            last_pk = None
+            while True:
+                page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                rows = list(page.values_list("pk", state_attname)[:batch_size])
+                if not rows:
+                    return
+                yield [(object_id, state_id, None) for object_id, state_id in rows]
+                last_pk = rows[-1][0]
+        else:
+            workflow_objects = list(workflow_objects)
+            if any(workflow_object.pk is None for workflow_object in workflow_objects):
+                raise ValueError("The workflow objects must be saved first. The objects returned by bulk_create have no primary keys on "
+                                 "some databases, so fetch them again or pass them as a queryset.")
+            for index in range(0, len(workflow_objects), batch_size):
+                yield [
+                    (workflow_object.pk, getattr(workflow_object, state_attname), workflow_object)
+                    for workflow_object in workflow_objects[index:index + batch_size]
+                ]
+
+    def _recent_approvals(self, object_ids):
+        latest_approval = TransitionApproval.objects.filter(
+            content_type=OuterRef("content_type"), object_id=OuterRef("object_id"), transaction_date__isnull=False
+        ).order_by("-transaction_date").values("pk")[:1]
+        return TransitionApproval.objects.filter(content_type=self._content_type, object_id__in=object_ids, pk=Subquery(latest_approval))
+
+    def _materialize_next_transitions(self, done_transitions):
+        """
+        Materializes the transitions leaving the destination states of the given done transitions when the approvals are
+        lazy, and the cycled paths of the objects going back to a state they have already left otherwise.
+        """
+        done_transitions = [transition for transition in done_transitions if self.workflow_graph.outgoing.get(transition.destination_state_id)]
+        if not done_transitions:
+            return
+
+        statuses = {}
+        for object_id, source_state_id, meta_id, status in Transition.objects.filter(
+                workflow=self.workflow,
+                object_id__in=[transition.object_id for transition in done_transitions],
+                status__in=[DONE, PENDING]
+        ).values_list("object_id", "source_state_id", "meta_id", "status"):
+            statuses.setdefault((object_id, source_state_id), []).append((meta_id, status))
+
+        entries = []
+        for transition in done_transitions:
+            state_id = transition.destination_state_id
+            state_statuses = statuses.get((transition.object_id, state_id), [])
+            if self.workflow.lazy_approvals:
+                pending_meta_ids = {meta_id for meta_id, status in state_statuses if status == PENDING}
+                entries.extend(
+                    (transition.object_id, transition_meta, transition.iteration + 1)
+                    for transition_meta in self.workflow_graph.outgoing[state_id]
+                    if transition_meta.pk not in pending_meta_ids
+                )
+            elif any(status == DONE for _, status in state_statuses) and not any(status == PENDING for _, status in state_statuses):
+                entries.extend(
+                    (transition.object_id, transition_meta, transition.iteration + 1 + level)
+                    for level, transition_metas in enumerate(self.workflow_graph.walk(state_id))
+                    for transition_meta in transition_metas
+                )
+        ApprovalMaterializer(self.workflow_graph, self._content_type).materialize(entries)
+
     @property
     def initial_state(self):
-        workflow = Workflow.objects.filter(content_type=self._content_type, field_name=self.field_name).first()
-        return workflow.initial_state if workflow else None
+        return self.workflow_graph.initial_state if self.workflow_graph else None
 
     @property
     def final_states(self):
-        all_states = TransitionMeta.objects.filter(workflow=self.workflow).values_list("source_state", "destination_state")
-        source_states = set([states[0] for states in all_states])
-        destination_states = set([states[1] for states in all_states])
-        final_states = destination_states - source_states
-        return State.objects.filter(pk__in=final_states)
+        return State.objects.filter(pk__in=self.workflow_graph.final_state_ids if self.workflow_graph else [])
+
+    def _correlated(self, approvals):
+        typed_object_id_field = TransitionApproval.typed_object_id_field(self.wokflow_object_class)
+        if typed_object_id_field:
+            return approvals.filter(**{typed_object_id_field: OuterRef("pk")})
+        return approvals.filter(object_id=Cast(OuterRef("pk"), output_field=CharField()))
 
     @property
     def _content_type(self):
         return ContentType.objects.get_for_model(self.wokflow_object_class)
+
+
+def _is_authorized(restriction, user_id, user_permission_ids, user_group_ids):
+    transactioner_id, permission_ids, group_ids = restriction
+    return (not transactioner_id or transactioner_id == user_id) and \
+           (not permission_ids or bool(permission_ids & user_permission_ids)) and \
+           (not group_ids or bool(group_ids & user_group_ids))
+
+
+def _encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    # binascii.Error, UnicodeError and JSONDecodeError are all ValueErrors.
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    except ValueError:
+        position = None
+    if not isinstance(position, list) or len(position) != 3:
+        raise RiverException(ErrorCode.INVALID_CURSOR, "Invalid cursor is given(%s)" % cursor)
+    return tuple(position)
+
+
+def _counts_key(workflow, as_user):
+    signature = authorization_signature_cache.get(as_user)
+    digest = hashlib.md5(json.dumps([signature.permission_ids, signature.group_ids]).encode("utf-8")).hexdigest()
+    return "river:on_approval_counts:%s:%s:%s" % (workflow.pk, as_user.pk, digest)
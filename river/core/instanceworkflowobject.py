@@ -1,14 +1,14 @@
 import logging
 
-import six
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
-from django.db.models import Q, Max
+from django.db.models import Min
 from django.db.transaction import atomic
 from django.utils import timezone
 
 from river.config import app_config
-from river.models import TransitionApproval, PENDING, State, APPROVED, Workflow, CANCELLED, Transition, DONE, JUMPED
+from river.core.approvalmaterializer import ApprovalMaterializer
+from river.models import TransitionApproval, PENDING, State, APPROVED, Transition, DONE, JUMPED
 from river.signals import ApproveSignal, TransitionSignal, OnCompleteSignal
 from river.utils.error_code import ErrorCode
 from river.utils.exceptions import RiverException
@@ -19,46 +19,24 @@ LOGGER = logging.getLogger(__name__)
 class InstanceWorkflowObject(object):
 
     def __init__(self, workflow_object, field_name):
-        self.class_workflow = getattr(workflow_object.__class__.river, field_name)
+        prefetched = workflow_object.__dict__.get("_river_prefetched", {}).get(field_name)
+        self.class_workflow = prefetched.class_workflow if prefetched else getattr(workflow_object.__class__.river, field_name)
         self.workflow_object = workflow_object
         self.content_type = app_config.CONTENT_TYPE_CLASS.objects.get_for_model(self.workflow_object)
         self.field_name = field_name
-        self.workflow = Workflow.objects.filter(content_type=self.content_type, field_name=self.field_name).first()
+        self.workflow_graph = self.class_workflow.workflow_graph
+        self.workflow = self.class_workflow.workflow
         self.initialized = False
 
     @transaction.atomic
     def initialize_approvals(self):
         if not self.initialized:
-            if self.workflow and self.workflow.transition_approvals.filter(workflow_object=self.workflow_object).count() == 0:
-                transition_meta_list = self.workflow.transition_metas.filter(source_state=self.workflow.initial_state)
-                iteration = 0
-                processed_transitions = []
-                while transition_meta_list:
-                    for transition_meta in transition_meta_list:
-                        transition = Transition.objects.create(
-                            workflow=self.workflow,
-                            workflow_object=self.workflow_object,
-                            source_state=transition_meta.source_state,
-                            destination_state=transition_meta.destination_state,
-                            meta=transition_meta,
-                            iteration=iteration
-                        )
-                        for transition_approval_meta in transition_meta.transition_approval_meta.all():
-                            transition_approval = TransitionApproval.objects.create(
-                                workflow=self.workflow,
-                                workflow_object=self.workflow_object,
-                                transition=transition,
-                                priority=transition_approval_meta.priority,
-                                meta=transition_approval_meta
-                            )
-                            transition_approval.permissions.add(*transition_approval_meta.permissions.all())
-                            transition_approval.groups.add(*transition_approval_meta.groups.all())
-                        processed_transitions.append(transition_meta.pk)
-                    transition_meta_list = self.workflow.transition_metas.filter(
-                        source_state__in=transition_meta_list.values_list("destination_state", flat=True)
-                    ).exclude(pk__in=processed_transitions)
-
-                    iteration += 1
+            if self.workflow and not self.workflow.transition_approvals.filter(workflow_object=self.workflow_object).exists():
+                ApprovalMaterializer(self.workflow_graph, self.content_type).materialize(
+                    (self.workflow_object.pk, transition_meta, iteration)
+                    for transition_meta, iteration in self.workflow_graph.initial_transitions(self._get_state_id())
+                )
+                self._refresh_actionable_approvals(self._get_state_id() or self.workflow_graph.initial_state_id)
                 self.initialized = True
                 LOGGER.debug("Transition approvals are initialized for the workflow object %s" % self.workflow_object)
 
@@ -68,15 +46,21 @@ class InstanceWorkflowObject(object):
 
     @property
     def on_final_state(self):
-        return self.class_workflow.final_states.filter(pk=self.get_state().pk).count() > 0
+        return bool(self.workflow_graph) and self._get_state_id() in self.workflow_graph.final_state_ids
 
     @property
     def next_approvals(self):
+        prefetched = self._prefetched
+        if prefetched:
+            return _prefetched_queryset(TransitionApproval, prefetched.next_approvals)
         transitions = Transition.objects.filter(workflow=self.workflow, object_id=self.workflow_object.pk, source_state=self.get_state())
         return TransitionApproval.objects.filter(transition__in=transitions)
 
     @property
     def recent_approval(self):
+        prefetched = self._prefetched
+        if prefetched:
+            return prefetched.recent_approval
         try:
             return getattr(self.workflow_object, self.field_name + "_transition_approvals").filter(transaction_date__isnull=False).latest('transaction_date')
         except TransitionApproval.DoesNotExist:
@@ -84,27 +68,35 @@ class InstanceWorkflowObject(object):
 
     @transaction.atomic
     def jump_to(self, state):
+        self._forget_prefetched()
+        if self.workflow and self.workflow.lazy_approvals:
+            return self._jump_lazily_to(state)
+
         def _transitions_before(iteration):
             return Transition.objects.filter(workflow=self.workflow, workflow_object=self.workflow_object, iteration__lte=iteration)
 
         try:
-            recent_iteration = self.recent_approval.transition.iteration if self.recent_approval else 0
+            recent_approval = self.recent_approval
+            recent_iteration = recent_approval.transition.iteration if recent_approval else 0
             jumped_transition = getattr(self.workflow_object, self.field_name + "_transitions").filter(
                 iteration__gte=recent_iteration, destination_state=state, status=PENDING
             ).earliest("iteration")
 
             jumped_transitions = _transitions_before(jumped_transition.iteration).filter(status=PENDING)
-            for approval in TransitionApproval.objects.filter(pk__in=jumped_transitions.values_list("transition_approvals__pk", flat=True)):
-                approval.status = JUMPED
-                approval.save()
-            jumped_transitions.update(status=JUMPED)
+            now = timezone.now()
+            TransitionApproval.objects.filter(transition__in=jumped_transitions).update(status=JUMPED, actionable=False, date_updated=now)
+            jumped_transitions.update(status=JUMPED, date_updated=now)
             self.set_state(state)
+            self._refresh_actionable_approvals()
             self.workflow_object.save()
 
         except Transition.DoesNotExist:
             raise RiverException(ErrorCode.STATE_IS_NOT_AVAILABLE_TO_BE_JUMPED, "This state is not available to be jumped in the future of this object")
 
     def get_available_states(self, as_user=None):
+        prefetched = self._prefetched
+        if prefetched and as_user and prefetched.as_user_id == as_user.pk:
+            return _prefetched_queryset(State, prefetched.available_states)
         all_destination_state_ids = self.get_available_approvals(as_user=as_user).values_list('transition__destination_state', flat=True)
         return State.objects.filter(pk__in=all_destination_state_ids)
 
@@ -117,81 +109,56 @@ class InstanceWorkflowObject(object):
 
     @atomic
     def approve(self, as_user, next_state=None):
-        available_approvals = self.get_available_approvals(as_user=as_user)
-        number_of_available_approvals = available_approvals.count()
-        if number_of_available_approvals == 0:
-            raise RiverException(ErrorCode.NO_AVAILABLE_NEXT_STATE_FOR_USER, "There is no available approval for the user.")
-        elif next_state:
-            available_approvals = available_approvals.filter(transition__destination_state=next_state)
-            if available_approvals.count() == 0:
-                available_states = self.get_available_states(as_user)
-                raise RiverException(ErrorCode.INVALID_NEXT_STATE_FOR_USER, "Invalid state is given(%s). Valid states is(are) %s" % (
-                    next_state.__str__(), ','.join([ast.__str__() for ast in available_states])))
-        elif number_of_available_approvals > 1 and not next_state:
-            raise RiverException(ErrorCode.NEXT_STATE_IS_REQUIRED, "State must be given when there are multiple states for destination")
-
-        approval = available_approvals.first()
+        self._forget_prefetched()
+        available_approvals = list(
+            TransitionApproval.objects
+                .select_for_update()
+                .select_related("transition__source_state", "transition__destination_state")
+                .filter(pk__in=self.get_available_approvals(as_user=as_user).values("pk"))
+                .order_by("pk")
+        )
+        approval = pick_approval(available_approvals, next_state)
         approval.status = APPROVED
+        approval.actionable = False
         approval.transactioner = as_user
         approval.transaction_date = timezone.now()
-        approval.previous = self.recent_approval
+        approval.previous_id = self._recent_approval_id()
         approval.save()
 
         if next_state:
             self.cancel_impossible_future(approval)
 
+        transition = approval.transition
         has_transit = False
-        if approval.peers.filter(status=PENDING).count() == 0:
-            approval.transition.status = DONE
-            approval.transition.save()
-            previous_state = self.get_state()
-            self.set_state(approval.transition.destination_state)
+        if not TransitionApproval.objects.filter(transition=transition, status=PENDING).exclude(pk=approval.pk).exists():
+            transition.status = DONE
+            transition.save(update_fields=["status", "date_updated"])
+            previous_state = transition.source_state
+            self.set_state(transition.destination_state)
             has_transit = True
-            if self._check_if_it_cycled(approval.transition):
-                self._re_create_cycled_path(approval.transition)
+            if self.workflow.lazy_approvals:
+                self._materialize_frontier(transition.destination_state_id, transition.iteration + 1)
+            elif self._check_if_it_cycled(transition):
+                self._re_create_cycled_path(transition)
             LOGGER.debug("Workflow object %s is proceeded for next transition. Transition: %s -> %s" % (
-                self.workflow_object, previous_state, self.get_state()))
+                self.workflow_object, previous_state, transition.destination_state))
 
+        self._refresh_actionable_approvals()
         with self._approve_signal(approval), self._transition_signal(has_transit, approval), self._on_complete_signal():
             self.workflow_object.save()
 
     @atomic
     def cancel_impossible_future(self, approved_approval):
-        transition = approved_approval.transition
-
-        possible_transition_ids = {transition.pk}
-
-        possible_next_states = {transition.destination_state.label}
-        while possible_next_states:
-            possible_transitions = Transition.objects.filter(
-                workflow=self.workflow,
-                object_id=self.workflow_object.pk,
-                status=PENDING,
-                source_state__label__in=possible_next_states
-            ).exclude(pk__in=possible_transition_ids)
-
-            possible_transition_ids.update(set(possible_transitions.values_list("pk", flat=True)))
-
-            possible_next_states = set(possible_transitions.values_list("destination_state__label", flat=True))
-
-        cancelled_transitions = Transition.objects.filter(
-            workflow=self.workflow,
-            object_id=self.workflow_object.pk,
-            status=PENDING,
-            iteration__gte=transition.iteration
-        ).exclude(pk__in=possible_transition_ids)
-
-        TransitionApproval.objects.filter(transition__in=cancelled_transitions).update(status=CANCELLED)
-        cancelled_transitions.update(status=CANCELLED)
+        self.class_workflow.cancel_impossible_futures([approved_approval])
 
     def _approve_signal(self, approval):
-        return ApproveSignal(self.workflow_object, self.field_name, approval)
+        return ApproveSignal(self.workflow_object, self.field_name, approval, workflow=self.workflow)
 
     def _transition_signal(self, has_transit, approval):
-        return TransitionSignal(has_transit, self.workflow_object, self.field_name, approval)
+        return TransitionSignal(has_transit, self.workflow_object, self.field_name, approval, workflow=self.workflow)
 
     def _on_complete_signal(self):
-        return OnCompleteSignal(self.workflow_object, self.field_name)
+        return OnCompleteSignal(self.workflow_object, self.field_name, workflow=self.workflow, status=self.on_final_state)
 
     @property
     def _content_type(self):
@@ -201,67 +168,104 @@ class InstanceWorkflowObject(object):
         return str(self.content_type.pk) + self.field_name + source_state.label
 
     def _check_if_it_cycled(self, done_transition):
-        qs = Transition.objects.filter(
-            workflow_object=self.workflow_object,
-            workflow=self.class_workflow.workflow,
-            source_state=done_transition.destination_state
-        )
+        if not self.workflow_graph.outgoing.get(done_transition.destination_state_id):
+            return False
 
-        return qs.filter(status=DONE).count() > 0 and qs.filter(status=PENDING).count() == 0
-
-    def _get_transition_images(self, source_states):
-        meta_max_iteration = Transition.objects.filter(
-            workflow=self.workflow,
+        statuses = set(Transition.objects.filter(
             workflow_object=self.workflow_object,
-            source_state__pk__in=source_states,
-        ).values_list("meta").annotate(max_iteration=Max("iteration"))
+            workflow=self.workflow,
+            source_state_id=done_transition.destination_state_id,
+            status__in=[DONE, PENDING]
+        ).values_list("status", flat=True).distinct())
 
-        return Transition.objects.filter(
-            Q(workflow=self.workflow, object_id=self.workflow_object.pk) &
-            six.moves.reduce(lambda agg, q: q | agg, [Q(meta__id=meta_id, iteration=max_iteration) for meta_id, max_iteration in meta_max_iteration], Q(pk=-1))
-        )
+        return DONE in statuses and PENDING not in statuses
 
-    def _re_create_cycled_path(self, done_transition):
-        old_transitions = self._get_transition_images([done_transition.destination_state.pk])
-
-        iteration = done_transition.iteration + 1
-        regenerated_transitions = set()
-        while old_transitions:
-            for old_transition in old_transitions:
-                cycled_transition = Transition.objects.create(
-                    source_state=old_transition.source_state,
-                    destination_state=old_transition.destination_state,
-                    workflow=old_transition.workflow,
-                    object_id=old_transition.workflow_object.pk,
-                    content_type=old_transition.content_type,
-                    status=PENDING,
-                    iteration=iteration,
-                    meta=old_transition.meta
-                )
+    def _recent_approval_id(self):
+        return getattr(self.workflow_object, self.field_name + "_transition_approvals") \
+            .filter(transaction_date__isnull=False).order_by("-transaction_date").values_list("pk", flat=True).first()
 
-                for old_approval in old_transition.transition_approvals.all():
-                    cycled_approval = TransitionApproval.objects.create(
-                        transition=cycled_transition,
-                        workflow=old_approval.workflow,
-                        object_id=old_approval.workflow_object.pk,
-                        content_type=old_approval.content_type,
-                        priority=old_approval.priority,
-                        status=PENDING,
-                        meta=old_approval.meta
-                    )
-                    cycled_approval.permissions.set(old_approval.permissions.all())
-                    cycled_approval.groups.set(old_approval.groups.all())
+    def _re_create_cycled_path(self, done_transition):
+        ApprovalMaterializer(self.workflow_graph, self.content_type).materialize(
+            (self.workflow_object.pk, transition_meta, done_transition.iteration + 1 + level)
+            for level, transition_metas in enumerate(self.workflow_graph.walk(done_transition.destination_state_id))
+            for transition_meta in transition_metas
+        )
 
-            regenerated_transitions.add((old_transition.source_state, old_transition.destination_state))
+    def _jump_lazily_to(self, state):
+        current_state_id = self._get_state_id()
+        level = self.workflow_graph.level_of(current_state_id, state.pk)
+        if level is None:
+            raise RiverException(ErrorCode.STATE_IS_NOT_AVAILABLE_TO_BE_JUMPED, "This state is not available to be jumped in the future of this object")
 
-            old_transitions = self._get_transition_images(old_transitions.values_list("destination_state__pk", flat=True)).exclude(
-                six.moves.reduce(lambda agg, q: q | agg, [Q(source_state=source_state, destination_state=destination_state) for source_state, destination_state in regenerated_transitions], Q(pk=-1))
-            )
+        pending_transitions = Transition.objects.filter(workflow=self.workflow, workflow_object=self.workflow_object, status=PENDING)
+        iteration = pending_transitions.filter(source_state_id=current_state_id).aggregate(iteration=Min("iteration"))["iteration"]
+        if iteration is None:
+            iteration = self.workflow_graph.depths.get(current_state_id, 0)
+
+        now = timezone.now()
+        TransitionApproval.objects.filter(transition__in=pending_transitions, status=PENDING).update(status=JUMPED, actionable=False, date_updated=now)
+        pending_transitions.update(status=JUMPED, date_updated=now)
+        self.set_state(state)
+        self._materialize_frontier(state.pk, iteration + level + 1)
+        self._refresh_actionable_approvals()
+        self.workflow_object.save()
+
+    def _materialize_frontier(self, state_id, iteration):
+        pending_meta_ids = set(
+            Transition.objects.filter(
+                workflow=self.workflow, workflow_object=self.workflow_object, source_state_id=state_id, status=PENDING
+            ).values_list("meta_id", flat=True)
+        )
+        ApprovalMaterializer(self.workflow_graph, self.content_type).materialize(
+            (self.workflow_object.pk, transition_meta, iteration)
+            for transition_meta in self.workflow_graph.outgoing.get(state_id, ())
+            if transition_meta.pk not in pending_meta_ids
+        )
 
-            iteration += 1
+    def _refresh_actionable_approvals(self, state_id=None):
+        TransitionApproval.objects.refresh_actionable(self.workflow, {self.workflow_object.pk: state_id or self._get_state_id()})
 
     def get_state(self):
         return getattr(self.workflow_object, self.field_name)
 
+    @property
+    def _prefetched(self):
+        prefetched = self.workflow_object.__dict__.get("_river_prefetched", {}).get(self.field_name)
+        return prefetched if prefetched and prefetched.state_id == self._get_state_id() else None
+
+    def _forget_prefetched(self):
+        self.workflow_object.__dict__.get("_river_prefetched", {}).pop(self.field_name, None)
+
+    def _get_state_id(self):
+        return getattr(self.workflow_object, self.workflow_object._meta.get_field(self.field_name).attname)
+
     def set_state(self, state):
         return setattr(self.workflow_object, self.field_name, state)
+
+
+def pick_approval(available_approvals, next_state=None):
+    """
+    Picks the approval to be approved among the ones available to the user for an object, which are fetched with their
+    transitions and states, or raises the error telling why none can be picked.
+    """
+    if not available_approvals:
+        raise RiverException(ErrorCode.NO_AVAILABLE_NEXT_STATE_FOR_USER, "There is no available approval for the user.")
+    elif next_state:
+        available_states = []
+        for approval in available_approvals:
+            if approval.transition.destination_state not in available_states:
+                available_states.append(approval.transition.destination_state)
+        available_approvals = [approval for approval in available_approvals if approval.transition.destination_state_id == next_state.pk]
+        if not available_approvals:
+            raise RiverException(ErrorCode.INVALID_NEXT_STATE_FOR_USER, "Invalid state is given(%s). Valid states is(are) %s" % (
+                next_state.__str__(), ','.join([ast.__str__() for ast in available_states])))
+    elif len(available_approvals) > 1:
+        raise RiverException(ErrorCode.NEXT_STATE_IS_REQUIRED, "State must be given when there are multiple states for destination")
+    return available_approvals[0]
+
+
+def _prefetched_queryset(model, objects):
+    queryset = model.objects.filter(pk__in=[obj.pk for obj in objects])
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    return queryset
@@ -0,0 +1,50 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q, Exists, OuterRef
+
+from river.core.authorizationsignature import authorization_signature_cache
+from river.core.workflowregistry import workflow_registry
+from river.models import TransitionApproval, Workflow, PENDING
+
+
+def get_available_approvals(as_user, with_workflow_objects=False):
+    """
+    Approvals available to the user across all the workflows registered by the state fields of every model, as a single
+    lazy queryset on ``TransitionApproval``. It can be ordered, sliced and paginated in the database like any queryset.
+    When ``with_workflow_objects`` is set, the workflow objects of the fetched approvals are prefetched with one query
+    per content type.
+    """
+    signature = authorization_signature_cache.get(as_user)
+    permissions = TransitionApproval.permissions.through.objects.filter(transitionapproval_id=OuterRef("pk"))
+    groups = TransitionApproval.groups.through.objects.filter(transitionapproval_id=OuterRef("pk"))
+
+    # The subqueries are annotated and then filtered on, since Exists can only be combined and filtered on directly from
+    # Django 3.0 on. The ones over an empty list of ids are left out, since Django 2.2 empties the whole query for them.
+    approvals = TransitionApproval.objects.annotate(_river_restricted_to_permissions=Exists(permissions), _river_restricted_to_groups=Exists(groups))
+    permitted = Q(_river_restricted_to_permissions=False)
+    if signature.permission_ids:
+        approvals = approvals.annotate(_river_permitted=Exists(permissions.filter(permission_id__in=signature.permission_ids)))
+        permitted = permitted | Q(_river_permitted=True)
+    in_group = Q(_river_restricted_to_groups=False)
+    if signature.group_ids:
+        approvals = approvals.annotate(_river_in_group=Exists(groups.filter(group_id__in=signature.group_ids)))
+        in_group = in_group | Q(_river_in_group=True)
+
+    approvals = approvals.filter(
+        Q(workflow__in=registered_workflows(), status=PENDING, actionable=True) &
+        (Q(transactioner__isnull=True) | Q(transactioner=as_user)) &
+        permitted &
+        in_group
+    )
+    return approvals.prefetch_related("workflow_object") if with_workflow_objects else approvals
+
+
+def registered_workflows():
+    workflow_qs = [
+        Q(content_type=ContentType.objects.get_for_model(cls), field_name=field_name)
+        for cls_id, cls in workflow_registry.class_index.items()
+        for field_name in workflow_registry.workflows[cls_id]
+    ]
+    return Workflow.objects.filter(reduce(or_, workflow_qs)) if workflow_qs else Workflow.objects.none()
@@ -0,0 +1,222 @@
+import logging
+from collections import namedtuple
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from river.config import app_config
+from river.models import State, Workflow, TransitionMeta, TransitionApprovalMeta
+
+LOGGER = logging.getLogger(__name__)
+
+TransitionMetaNode = namedtuple("TransitionMetaNode", ["pk", "source_state_id", "destination_state_id", "approval_metas"])
+ApprovalMetaTemplate = namedtuple("ApprovalMetaTemplate", ["pk", "priority", "permission_ids", "group_ids"])
+
+
+class WorkflowGraph(object):
+    """
+    Compiled and immutable form of a workflow definition. It is built once out of
+    ``Workflow``, ``TransitionMeta`` and ``TransitionApprovalMeta`` rows so that the core
+    APIs don't need to read the definition from the database over and over again.
+    """
+
+    def __init__(self, workflow, states, transition_metas):
+        self.workflow = workflow
+        self.version = workflow.version
+        self.states = states
+        self.transition_metas = tuple(transition_metas)
+        self.initial_state_id = workflow.initial_state_id
+
+        outgoing = {}
+        for transition_meta in self.transition_metas:
+            outgoing.setdefault(transition_meta.source_state_id, []).append(transition_meta)
+        self.outgoing = {state_id: tuple(transition_metas) for state_id, transition_metas in outgoing.items()}
+
+        source_state_ids = set(transition_meta.source_state_id for transition_meta in self.transition_metas)
+        destination_state_ids = set(transition_meta.destination_state_id for transition_meta in self.transition_metas)
+        self.final_state_ids = frozenset(destination_state_ids - source_state_ids)
+
+        self.levels = self.walk(self.initial_state_id)
+        depths = {self.initial_state_id: 0}
+        for depth, level in enumerate(self.levels):
+            for transition_meta in level:
+                depths.setdefault(transition_meta.destination_state_id, depth + 1)
+        self.depths = depths
+
+    @classmethod
+    def build(cls, workflow):
+        transition_meta_rows = list(
+            TransitionMeta.objects.filter(workflow=workflow).order_by("pk").values_list("pk", "source_state_id", "destination_state_id")
+        )
+
+        state_ids = {workflow.initial_state_id}
+        for _, source_state_id, destination_state_id in transition_meta_rows:
+            state_ids.update([source_state_id, destination_state_id])
+        states = State.objects.in_bulk(state_ids)
+
+        permission_ids = {}
+        for approval_meta_id, permission_id in TransitionApprovalMeta.permissions.through.objects.filter(
+                transitionapprovalmeta__workflow=workflow).values_list("transitionapprovalmeta_id", "permission_id"):
+            permission_ids.setdefault(approval_meta_id, []).append(permission_id)
+
+        group_ids = {}
+        for approval_meta_id, group_id in TransitionApprovalMeta.groups.through.objects.filter(
+                transitionapprovalmeta__workflow=workflow).values_list("transitionapprovalmeta_id", "group_id"):
+            group_ids.setdefault(approval_meta_id, []).append(group_id)
+
+        approval_metas = {}
+        for pk, transition_meta_id, priority in TransitionApprovalMeta.objects.filter(workflow=workflow).order_by("priority", "pk").values_list(
+                "pk", "transition_meta_id", "priority"):
+            approval_metas.setdefault(transition_meta_id, []).append(
+                ApprovalMetaTemplate(pk, priority, tuple(sorted(permission_ids.get(pk, []))), tuple(sorted(group_ids.get(pk, []))))
+            )
+
+        transition_metas = [
+            TransitionMetaNode(pk, source_state_id, destination_state_id, tuple(approval_metas.get(pk, [])))
+            for pk, source_state_id, destination_state_id in transition_meta_rows
+        ]
+
+        LOGGER.debug("Workflow graph is compiled for the workflow %s" % workflow)
+        return cls(workflow, states, transition_metas)
+
+    @property
+    def initial_state(self):
+        return self.states.get(self.initial_state_id)
+
+    def initial_transitions(self, state_id=None):
+        """
+        The ``(transition_meta, iteration)`` pairs to be materialized for a new workflow object. It is the whole walk
+        from the initial state unless the workflow is lazy, in which case it is only the transitions leaving the
+        current state of the object.
+        """
+        if self.workflow.lazy_approvals:
+            state_id = state_id or self.initial_state_id
+            iteration = self.depths.get(state_id, 0)
+            return tuple((transition_meta, iteration) for transition_meta in self.outgoing.get(state_id, ()))
+        return tuple((transition_meta, iteration) for iteration, transition_metas in enumerate(self.levels) for transition_meta in transition_metas)
+
+    def level_of(self, state_id, destination_state_id):
+        """
+        The level of the walk from the given state where the destination state is reached first, ``None`` if it is unreachable.
+        """
+        for level, transition_metas in enumerate(self.walk(state_id)):
+            if any(transition_meta.destination_state_id == destination_state_id for transition_meta in transition_metas):
+                return level
+        return None
+
+    def walk(self, state_id):
+        """
+        Breadth first walk of the transition metas starting from the ones leaving the given state. Every transition meta
+        is visited only once and the result is the list of the levels, each being a tuple of transition metas.
+        """
+        levels = []
+        visited = set()
+        level = [transition_meta for transition_meta in self.outgoing.get(state_id, ())]
+        while level:
+            levels.append(tuple(level))
+            visited.update(transition_meta.pk for transition_meta in level)
+            destination_state_ids = set(transition_meta.destination_state_id for transition_meta in level)
+            level = [
+                transition_meta
+                for transition_meta in self.transition_metas
+                if transition_meta.source_state_id in destination_state_ids and transition_meta.pk not in visited
+            ]
+        return tuple(levels)
+
+
+class WorkflowGraphCache(object):
+    """
+    Process local cache of the compiled workflow graphs by content type and field name. A cached graph is trusted only as
+    long as its definition version matches the one in the database. When ``RIVER_CACHE_ALIAS`` is set, the current versions
+    are shared through that Django cache so that checking them doesn't cost a query.
+    """
+
+    def __init__(self):
+        self._graphs = {}
+
+    def get(self, content_type, field_name):
+        key = (content_type.pk, field_name)
+        version = self._get_version(content_type.pk, field_name)
+        if key not in self._graphs or self._version_of(self._graphs[key]) != version:
+            workflow = Workflow.objects.filter(content_type=content_type, field_name=field_name).select_related("initial_state").first()
+            self._graphs[key] = WorkflowGraph.build(workflow) if workflow else None
+        return self._graphs[key]
+
+    def invalidate(self, workflow_id=None, content_type_id=None, field_name=None):
+        for key, graph in list(self._graphs.items()):
+            if key == (content_type_id, field_name) or (graph and graph.workflow.pk == workflow_id):
+                self._graphs.pop(key, None)
+
+    def clear(self):
+        self._graphs.clear()
+
+    def expire_versions(self, *keys):
+        shared_cache = self._shared_cache
+        if shared_cache and keys:
+            version_keys = [_version_key(content_type_id, field_name) for content_type_id, field_name in keys]
+            shared_cache.delete_many(version_keys)
+            transaction.on_commit(lambda: shared_cache.delete_many(version_keys))
+
+    def _get_version(self, content_type_id, field_name):
+        shared_cache = self._shared_cache
+        if shared_cache:
+            version = shared_cache.get(_version_key(content_type_id, field_name))
+            if version is not None:
+                return tuple(version) or None
+
+        version = Workflow.objects.filter(content_type_id=content_type_id, field_name=field_name).values_list("pk", "version").first()
+        if shared_cache:
+            shared_cache.set(_version_key(content_type_id, field_name), version or ())
+        return version
+
+    @staticmethod
+    def _version_of(graph):
+        return (graph.workflow.pk, graph.version) if graph else None
+
+    @property
+    def _shared_cache(self):
+        return caches[app_config.CACHE_ALIAS] if app_config.CACHE_ALIAS else None
+
+
+def _version_key(content_type_id, field_name):
+    return "river:workflow_version:%s:%s" % (content_type_id, field_name)
+
+
+workflow_graph_cache = WorkflowGraphCache()
+
+
+def _on_workflow_changed(sender, instance, *args, **kwargs):
+    workflow_graph_cache.invalidate(workflow_id=instance.pk, content_type_id=instance.content_type_id, field_name=instance.field_name)
+    workflow_graph_cache.expire_versions((instance.content_type_id, instance.field_name))
+
+
+def _on_workflow_meta_changed(sender, instance, *args, **kwargs):
+    workflow_graph_cache.invalidate(workflow_id=instance.workflow_id)
+    if app_config.CACHE_ALIAS:
+        workflow_graph_cache.expire_versions(*Workflow.objects.filter(pk=instance.workflow_id).values_list("content_type_id", "field_name"))
+
+
+def _on_approval_meta_authorization_changed(sender, instance, reverse, *args, **kwargs):
+    if reverse:
+        workflow_graph_cache.clear()
+        if app_config.CACHE_ALIAS:
+            workflow_graph_cache.expire_versions(*Workflow.objects.values_list("content_type_id", "field_name"))
+    else:
+        _on_workflow_meta_changed(sender, instance)
+
+
+def _on_state_changed(sender, instance, *args, **kwargs):
+    workflow_graph_cache.clear()
+
+
+post_save.connect(_on_workflow_changed, sender=Workflow)
+post_delete.connect(_on_workflow_changed, sender=Workflow)
+post_save.connect(_on_workflow_meta_changed, sender=TransitionMeta)
+post_delete.connect(_on_workflow_meta_changed, sender=TransitionMeta)
+post_save.connect(_on_workflow_meta_changed, sender=TransitionApprovalMeta)
+post_delete.connect(_on_workflow_meta_changed, sender=TransitionApprovalMeta)
+m2m_changed.connect(_on_approval_meta_authorization_changed, sender=TransitionApprovalMeta.permissions.through)
+m2m_changed.connect(_on_approval_meta_authorization_changed, sender=TransitionApprovalMeta.groups.through)
+post_save.connect(_on_state_changed, sender=State)
+post_delete.connect(_on_state_changed, sender=State)
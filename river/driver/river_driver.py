@@ -2,6 +2,7 @@ from abc import abstractmethod
 
 
 class RiverDriver(object):
+    vendors = None
 
     def __init__(self, workflow, wokflow_object_class, field_name):
         self.workflow = workflow
@@ -12,3 +13,7 @@ class RiverDriver(object):
     @abstractmethod
     def get_available_approvals(self, as_user):
         raise NotImplementedError()
+
+    @staticmethod
+    def _placeholders(values):
+        return ", ".join(["%s"] * len(values)) or "NULL"
@@ -0,0 +1,43 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('river', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='version',
+            field=models.IntegerField(default=0, verbose_name='Definition Version'),
+        ),
+        migrations.AlterField(
+            model_name='onapprovedhook',
+            name='hook_type',
+            field=models.CharField(choices=[('BEFORE', 'Before'), ('AFTER', 'After')], max_length=50, verbose_name='When?'),
+        ),
+        migrations.AlterField(
+            model_name='oncompletehook',
+            name='hook_type',
+            field=models.CharField(choices=[('BEFORE', 'Before'), ('AFTER', 'After')], max_length=50, verbose_name='When?'),
+        ),
+        migrations.AlterField(
+            model_name='ontransithook',
+            name='hook_type',
+            field=models.CharField(choices=[('BEFORE', 'Before'), ('AFTER', 'After')], max_length=50, verbose_name='When?'),
+        ),
+        migrations.AlterField(
+            model_name='transition',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('cancelled', 'Cancelled'), ('done', 'Done'), ('jumped', 'Jumped')], default='pending', max_length=100, verbose_name='Status'),
+        ),
+        migrations.AlterField(
+            model_name='transitionapproval',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('cancelled', 'Cancelled'), ('jumped', 'Jumped')], default='pending', max_length=100, verbose_name='Status'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('river', '0002_workflow_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='lazy_approvals',
+            field=models.BooleanField(default=False, help_text='Create the transitions and the approvals only for the current state of the objects instead of their whole future', verbose_name='Lazy Approvals'),
+        ),
+    ]
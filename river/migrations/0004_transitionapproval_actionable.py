@@ -0,0 +1,62 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 500
+
+
+def _chunks(items):
+    for index in range(0, len(items), CHUNK_SIZE):
+        yield items[index:index + CHUNK_SIZE]
+
+
+def mark_actionable_approvals(apps, schema_editor):
+    TransitionApproval = apps.get_model("river", "TransitionApproval")
+    Workflow = apps.get_model("river", "Workflow")
+
+    for workflow in Workflow.objects.select_related("content_type"):
+        try:
+            workflow_object_class = apps.get_model(workflow.content_type.app_label, workflow.content_type.model)
+        except LookupError:
+            continue
+
+        # The workflow objects are walked page by page, so that only the pending approvals of one page are held in memory.
+        state_attname = workflow_object_class._meta.get_field(workflow.field_name).attname
+        workflow_objects = workflow_object_class.objects.order_by("pk").values_list("pk", state_attname)
+        last_pk = None
+        while True:
+            page = list((workflow_objects if last_pk is None else workflow_objects.filter(pk__gt=last_pk))[:CHUNK_SIZE])
+            if not page:
+                break
+            last_pk = page[-1][0]
+
+            state_ids = {str(pk): state_id for pk, state_id in page}
+            pending_approvals = [
+                (pk, transition_id, priority)
+                for pk, object_id, transition_id, source_state_id, priority in TransitionApproval.objects.filter(
+                    workflow=workflow, status="pending", object_id__in=list(state_ids)
+                ).values_list("pk", "object_id", "transition_id", "transition__source_state_id", "priority")
+                if state_ids[object_id] == source_state_id
+            ]
+            min_priorities = {}
+            for _, transition_id, priority in pending_approvals:
+                min_priorities[transition_id] = min(priority, min_priorities.get(transition_id, priority))
+
+            for approval_ids in _chunks([pk for pk, transition_id, priority in pending_approvals if priority == min_priorities[transition_id]]):
+                TransitionApproval.objects.filter(pk__in=approval_ids).update(actionable=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('river', '0003_workflow_lazy_approvals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transitionapproval',
+            name='actionable',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Actionable'),
+        ),
+        migrations.RunPython(mark_actionable_approvals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('river', '0004_transitionapproval_actionable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('principal_type', models.CharField(choices=[('anyone', 'Anyone'), ('user', 'User'), ('group', 'Group'), ('permission', 'Permission')], max_length=20, verbose_name='Principal Type')),
+                ('principal_id', models.CharField(blank=True, max_length=50, verbose_name='Principal')),
+                ('object_id', models.CharField(max_length=50, verbose_name='Related Object')),
+                ('transition_approval', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='river.transitionapproval', verbose_name='Transition Approval')),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='river.workflow', verbose_name='Workflow')),
+            ],
+            options={
+                'verbose_name': 'Inbox Entry',
+                'verbose_name_plural': 'Inbox Entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inboxentry',
+            index=models.Index(fields=['principal_type', 'principal_id', 'workflow', 'object_id'], name='river_inbox_principal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inboxentry',
+            index=models.Index(fields=['workflow', 'object_id'], name='river_inbox_object_idx'),
+        ),
+    ]
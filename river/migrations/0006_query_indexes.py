@@ -0,0 +1,50 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:33
+
+from django.db import migrations, models
+import river.models.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('river', '0005_inboxentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='onapprovedhook',
+            index=models.Index(fields=['transition_approval_meta', 'hook_type'], name='river_onapprovedhook_meta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='oncompletehook',
+            index=models.Index(fields=['workflow', 'hook_type'], name='river_oncompletehook_wf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ontransithook',
+            index=models.Index(fields=['transition_meta', 'hook_type', 'workflow'], name='river_ontransithook_meta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transition',
+            index=models.Index(fields=['object_id', 'workflow', 'status', 'source_state'], name='river_tr_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transition',
+            index=models.Index(fields=['workflow', 'status'], name='river_tr_workflow_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transitionapproval',
+            index=river.models.indexes.PartialIndex(condition=models.Q(actionable=True), fields=['workflow', 'status', 'object_id'], name='river_ta_actionable_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transitionapproval',
+            index=river.models.indexes.PartialIndex(condition=models.Q(status='pending'), fields=['workflow', 'object_id', 'transition'], name='river_ta_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transitionapproval',
+            index=models.Index(fields=['transition', 'priority'], name='river_ta_transition_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transitionapproval',
+            index=river.models.indexes.PartialIndex(condition=models.Q(transaction_date__isnull=False), fields=['content_type', 'object_id', 'transaction_date'], name='river_ta_recent_idx'),
+        ),
+    ]
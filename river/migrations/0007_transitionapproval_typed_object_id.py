@@ -0,0 +1,67 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:35
+
+import uuid
+
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+INTEGER_TYPES = [
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+]
+
+
+def backfill_typed_object_ids(apps, schema_editor):
+    TransitionApproval = apps.get_model("river", "TransitionApproval")
+    Workflow = apps.get_model("river", "Workflow")
+
+    for workflow in Workflow.objects.select_related("content_type"):
+        try:
+            workflow_object_class = apps.get_model(workflow.content_type.app_label, workflow.content_type.model)
+        except LookupError:
+            continue
+
+        pk = workflow_object_class._meta.pk
+        internal_type = (pk.target_field if pk.is_relation else pk).get_internal_type()
+        approvals = TransitionApproval.objects.filter(workflow=workflow, content_type=workflow.content_type)
+        if internal_type in INTEGER_TYPES:
+            approvals.filter(object_int_id__isnull=True).update(object_int_id=Cast("object_id", models.BigIntegerField()))
+        elif internal_type == "UUIDField":
+            for object_id in approvals.filter(object_uuid__isnull=True).values_list("object_id", flat=True).distinct():
+                approvals.filter(object_id=object_id).update(object_uuid=uuid.UUID(object_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('river', '0006_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transitionapproval',
+            name='object_int_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='Related Object (Integer)'),
+        ),
+        migrations.AddField(
+            model_name='transitionapproval',
+            name='object_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name='Related Object (UUID)'),
+        ),
+        migrations.AddIndex(
+            model_name='transitionapproval',
+            index=models.Index(fields=['object_int_id', 'workflow'], name='river_ta_object_int_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transitionapproval',
+            index=models.Index(fields=['object_uuid', 'workflow'], name='river_ta_object_uuid_idx'),
+        ),
+        migrations.RunPython(backfill_typed_object_ids, migrations.RunPython.noop),
+    ]
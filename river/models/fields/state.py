@@ -69,13 +69,15 @@ class StateField(models.ForeignKey):
 
 
 def _on_workflow_object_saved(sender, instance, created, *args, **kwargs):
+    if not created:
+        return
+
     for instance_workflow in instance.river.all(instance.__class__):
-        if created:
-            instance_workflow.initialize_approvals()
-            if not instance_workflow.get_state():
-                init_state = getattr(instance.__class__.river, instance_workflow.field_name).initial_state
-                instance_workflow.set_state(init_state)
-                instance.save()
+        instance_workflow.initialize_approvals()
+        if not instance_workflow.get_state():
+            init_state = getattr(instance.__class__.river, instance_workflow.field_name).initial_state
+            instance_workflow.set_state(init_state)
+            instance.save()
 
 
 def _on_workflow_object_deleted(sender, instance, *args, **kwargs):
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import CASCADE, Q
+from django.db.models.signals import m2m_changed
+from django.utils.translation import ugettext_lazy as _
+
+from river.config import app_config
+from river.models import Workflow, TransitionApproval
+from river.models.managers.inboxentry import InboxEntryManager
+
+ANYONE = "anyone"
+USER = "user"
+GROUP = "group"
+PERMISSION = "permission"
+
+PRINCIPAL_TYPES = [
+    (ANYONE, _('Anyone')),
+    (USER, _('User')),
+    (GROUP, _('Group')),
+    (PERMISSION, _('Permission')),
+]
+
+
+class InboxEntry(models.Model):
+    """
+    Projection of the actionable transition approvals onto the principals who can approve them. It is maintained only
+    when ``RIVER_INBOX_ENABLED`` is set and lets the objects waiting for a user be read with an indexed scan.
+    """
+
+    class Meta:
+        app_label = 'river'
+        verbose_name = _("Inbox Entry")
+        verbose_name_plural = _("Inbox Entries")
+        indexes = [
+            models.Index(fields=['principal_type', 'principal_id', 'workflow', 'object_id'], name='river_inbox_principal_idx'),
+            models.Index(fields=['workflow', 'object_id'], name='river_inbox_object_idx'),
+        ]
+
+    objects = InboxEntryManager()
+
+    principal_type = models.CharField(_('Principal Type'), choices=PRINCIPAL_TYPES, max_length=20)
+    principal_id = models.CharField(_('Principal'), max_length=50, blank=True)
+    workflow = models.ForeignKey(Workflow, verbose_name=_("Workflow"), related_name='inbox_entries', on_delete=CASCADE)
+    object_id = models.CharField(max_length=50, verbose_name=_('Related Object'))
+    transition_approval = models.ForeignKey(TransitionApproval, verbose_name=_("Transition Approval"), related_name='inbox_entries', on_delete=CASCADE)
+
+
+def _combined_approvals():
+    return TransitionApproval.objects.filter(actionable=True).filter(
+        Q(transactioner__isnull=False, permissions__isnull=False) |
+        Q(transactioner__isnull=False, groups__isnull=False) |
+        Q(permissions__isnull=False, groups__isnull=False)
+    )
+
+
+def _user_approvals(user_id):
+    return TransitionApproval.objects.filter(inbox_entries__principal_type=USER, inbox_entries__principal_id=str(user_id))
+
+
+def _on_user_groups_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    if not app_config.INBOX_ENABLED or action not in ["post_add", "post_remove", "post_clear"]:
+        return
+
+    if reverse:
+        InboxEntry.objects.refresh_approvals(_combined_approvals().filter(groups=instance))
+    else:
+        InboxEntry.objects.refresh_approvals(_combined_approvals().filter(groups__in=pk_set or []) | _user_approvals(instance.pk))
+
+
+def _on_user_permissions_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    if not app_config.INBOX_ENABLED or action not in ["post_add", "post_remove", "post_clear"]:
+        return
+
+    if reverse:
+        InboxEntry.objects.refresh_approvals(_combined_approvals().filter(permissions=instance))
+    else:
+        InboxEntry.objects.refresh_approvals(_combined_approvals().filter(permissions__in=pk_set or []) | _user_approvals(instance.pk))
+
+
+def _on_group_permissions_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    if not app_config.INBOX_ENABLED or action not in ["post_add", "post_remove", "post_clear"]:
+        return
+
+    if reverse:
+        InboxEntry.objects.refresh_approvals(_combined_approvals().filter(permissions=instance))
+    else:
+        InboxEntry.objects.refresh_approvals(_combined_approvals().filter(Q(permissions__in=pk_set or []) | Q(groups=instance)))
+
+
+m2m_changed.connect(_on_user_groups_changed, sender=settings.AUTH_USER_MODEL + "_groups")
+m2m_changed.connect(_on_user_permissions_changed, sender=settings.AUTH_USER_MODEL + "_user_permissions")
+m2m_changed.connect(_on_group_permissions_changed, sender=app_config.GROUP_CLASS.permissions.through)
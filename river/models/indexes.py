@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class PartialIndex(models.Index):
+    """
+    An index restricted to the rows meeting its condition. The databases which don't support partial indexes, like MySQL,
+    get an index on the whole table instead of failing on the condition.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if self.condition is not None and not schema_editor.connection.features.supports_partial_indexes:
+            index = models.Index(fields=self.fields, name=self.name, db_tablespace=self.db_tablespace, opclasses=self.opclasses)
+            return index.create_sql(model, schema_editor, using=using, **kwargs)
+        return super(PartialIndex, self).create_sql(model, schema_editor, using=using, **kwargs)
@@ -0,0 +1,121 @@
+from django.contrib import auth
+from django.db.models import Q
+
+from river.models.managers.rivermanager import RiverManager
+
+
+class InboxEntryManager(RiverManager):
+
+    def refresh(self, workflow, object_ids):
+        """
+        Re-computes the inbox entries of the given workflow objects out of their actionable approvals. Approvals restricted
+        on a single dimension are fanned out to their permissions, groups or transactioner; the ones restricted on more than
+        one dimension are fanned out to the users meeting all of them.
+        """
+        from river.models.inboxentry import ANYONE, USER, GROUP, PERMISSION
+        from river.models.transitionapproval import TransitionApproval
+
+        object_ids = [str(object_id) for object_id in object_ids]
+        if not object_ids:
+            return
+
+        self.filter(workflow=workflow, object_id__in=object_ids).delete()
+
+        approvals = list(TransitionApproval.objects.filter(workflow=workflow, object_id__in=object_ids, actionable=True).values_list("pk", "object_id", "transactioner_id"))
+        approval_ids = [pk for pk, _, _ in approvals]
+
+        permission_ids = {}
+        for approval_id, permission_id in TransitionApproval.permissions.through.objects.filter(transitionapproval_id__in=approval_ids).values_list(
+                "transitionapproval_id", "permission_id"):
+            permission_ids.setdefault(approval_id, []).append(permission_id)
+
+        group_ids = {}
+        for approval_id, group_id in TransitionApproval.groups.through.objects.filter(transitionapproval_id__in=approval_ids).values_list(
+                "transitionapproval_id", "group_id"):
+            group_ids.setdefault(approval_id, []).append(group_id)
+
+        authorized_users = {}
+        entries = []
+        for approval_id, object_id, transactioner_id in approvals:
+            approval_permission_ids = tuple(sorted(permission_ids.get(approval_id, [])))
+            approval_group_ids = tuple(sorted(group_ids.get(approval_id, [])))
+            restrictions = [bool(transactioner_id), bool(approval_permission_ids), bool(approval_group_ids)]
+
+            if not any(restrictions):
+                principals = [(ANYONE, "")]
+            elif sum(restrictions) > 1:
+                signature = (transactioner_id, approval_permission_ids, approval_group_ids)
+                if signature not in authorized_users:
+                    authorized_users[signature] = self._authorized_user_ids(*signature)
+                principals = [(USER, user_id) for user_id in authorized_users[signature]]
+            elif transactioner_id:
+                principals = [(USER, transactioner_id)]
+            elif approval_permission_ids:
+                principals = [(PERMISSION, permission_id) for permission_id in approval_permission_ids]
+            else:
+                principals = [(GROUP, group_id) for group_id in approval_group_ids]
+
+            entries.extend(
+                self.model(
+                    principal_type=principal_type,
+                    principal_id=str(principal_id),
+                    workflow=workflow,
+                    object_id=object_id,
+                    transition_approval_id=approval_id
+                )
+                for principal_type, principal_id in principals
+            )
+
+        self.bulk_create(entries)
+
+    def refresh_approvals(self, approvals):
+        object_ids = {}
+        for workflow_id, object_id in approvals.values_list("workflow_id", "object_id").distinct():
+            object_ids.setdefault(workflow_id, set()).add(object_id)
+
+        from river.models.workflow import Workflow
+        for workflow in Workflow.objects.filter(pk__in=object_ids):
+            self.refresh(workflow, object_ids[workflow.pk])
+
+    def rebuild(self, workflow):
+        from river.models.transitionapproval import TransitionApproval
+
+        self.filter(workflow=workflow).delete()
+        self.refresh(workflow, TransitionApproval.objects.filter(workflow=workflow, actionable=True).values_list("object_id", flat=True).distinct())
+
+    def entries_for(self, workflow, as_user):
+        return self.filter(Q(workflow=workflow) & self._principal_q(as_user))
+
+    def object_ids_for(self, workflow, as_user, after=None, limit=None):
+        """
+        Ids of the workflow objects waiting for the given user in ascending order. Pages are fetched by passing the last id
+        of the previous page as ``after``.
+        """
+        object_ids = self.entries_for(workflow, as_user).values_list("object_id", flat=True).distinct().order_by("object_id")
+        if after is not None:
+            object_ids = object_ids.filter(object_id__gt=str(after))
+        return list(object_ids[:limit] if limit else object_ids)
+
+    @staticmethod
+    def _principal_q(as_user):
+        from river.models.inboxentry import ANYONE, USER, GROUP, PERMISSION
+        from river.core.authorizationsignature import authorization_signature_cache
+
+        signature = authorization_signature_cache.get(as_user)
+        return Q(principal_type=ANYONE) | \
+               Q(principal_type=USER, principal_id=str(as_user.pk)) | \
+               Q(principal_type=GROUP, principal_id__in=[str(group_id) for group_id in signature.group_ids]) | \
+               Q(principal_type=PERMISSION, principal_id__in=[str(permission_id) for permission_id in signature.permission_ids])
+
+    @staticmethod
+    def _authorized_user_ids(transactioner_id, permission_ids, group_ids):
+        users = auth.get_user_model()._default_manager.all()
+        if transactioner_id:
+            users = users.filter(pk=transactioner_id)
+        if group_ids:
+            users = users.filter(groups__in=group_ids)
+        if permission_ids:
+            users = users.filter(is_active=True).filter(
+                Q(is_superuser=True) | Q(user_permissions__in=permission_ids) | Q(groups__permissions__in=permission_ids)
+            )
+        return sorted(set(users.values_list("pk", flat=True)))
@@ -1,8 +1,12 @@
+from django.db.models import Q
 from django_cte import CTEManager
 
 from river.config import app_config
 from river.models.managers.rivermanager import RiverManager
 
+# Keeps the IN lists of the refreshes under the parameter limits of the database backends.
+CHUNK_SIZE = 500
+
 
 class TransitionApprovalManager(RiverManager if app_config.IS_MSSQL else CTEManager):
     def __init__(self, *args, **kwargs):
@@ -23,3 +27,48 @@ class TransitionApprovalManager(RiverManager if app_config.IS_MSSQL else CTEMana
             kwarg['object_id'] = workflow_object.pk
 
         return super(TransitionApprovalManager, self).update_or_create(*args, **kwarg)
+
+    def refresh_actionable(self, workflow, state_ids):
+        """
+        Re-computes the ``actionable`` flag of the approvals of the given workflow objects. ``state_ids`` maps the primary keys
+        of the workflow objects to their current state ids. An approval is actionable when it is pending, its transition is
+        leaving the current state of its object and it has the lowest priority among the pending approvals of its transition.
+        """
+        from river.models.transitionapproval import PENDING
+
+        state_ids = {str(object_id): state_id for object_id, state_id in state_ids.items()}
+        if not state_ids:
+            return
+
+        for object_ids in _chunks(list(state_ids), CHUNK_SIZE):
+            approvals = list(
+                self.filter(Q(workflow=workflow, object_id__in=object_ids) & (Q(status=PENDING) | Q(actionable=True)))
+                    .values_list("pk", "object_id", "transition_id", "transition__source_state_id", "priority", "status", "actionable")
+            )
+
+            min_priorities = {}
+            for _, object_id, transition_id, source_state_id, priority, status, _ in approvals:
+                if status == PENDING and source_state_id == state_ids[object_id]:
+                    min_priorities[transition_id] = min(priority, min_priorities.get(transition_id, priority))
+
+            flagged_ids, unflagged_ids = [], []
+            for pk, object_id, transition_id, source_state_id, priority, status, actionable in approvals:
+                is_actionable = status == PENDING and source_state_id == state_ids[object_id] and priority == min_priorities[transition_id]
+                if is_actionable and not actionable:
+                    flagged_ids.append(pk)
+                elif actionable and not is_actionable:
+                    unflagged_ids.append(pk)
+
+            for approval_ids in _chunks(unflagged_ids, CHUNK_SIZE):
+                self.filter(pk__in=approval_ids).update(actionable=False)
+            for approval_ids in _chunks(flagged_ids, CHUNK_SIZE):
+                self.filter(pk__in=approval_ids).update(actionable=True)
+
+            if app_config.INBOX_ENABLED:
+                from river.models.inboxentry import InboxEntry
+                InboxEntry.objects.refresh(workflow, object_ids)
+
+
+def _chunks(values, size):
+    for index in range(0, len(values), size):
+        yield values[index:index + size]
@@ -1,6 +1,11 @@
+from django.db.models import F
+
 from river.models.managers.rivermanager import RiverManager
 
 
 class WorkflowManager(RiverManager):
     def get_by_natural_key(self, content_type, field_name):
         return self.get(content_type=content_type, field_name=field_name)
+
+    def bump_version(self, *workflow_ids):
+        return self.filter(pk__in=workflow_ids).update(version=F("version") + 1)
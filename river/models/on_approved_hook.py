@@ -9,6 +9,7 @@ from river.models.hook import Hook
 class OnApprovedHook(Hook):
     class Meta:
         unique_together = [('callback_function', 'workflow', 'transition_approval_meta', 'content_type', 'object_id', 'transition_approval')]
+        indexes = [models.Index(fields=['transition_approval_meta', 'hook_type'], name='river_onapprovedhook_meta_idx')]
 
     transition_approval_meta = models.ForeignKey(
         TransitionApprovalMeta, verbose_name=_("Transition Approval Meta"), related_name='on_approved_hooks', on_delete=CASCADE)
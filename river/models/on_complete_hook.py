@@ -1,6 +1,9 @@
+from django.db import models
+
 from river.models.hook import Hook
 
 
 class OnCompleteHook(Hook):
     class Meta:
         unique_together = [('callback_function', 'workflow', 'content_type', 'object_id')]
+        indexes = [models.Index(fields=['workflow', 'hook_type'], name='river_oncompletehook_wf_idx')]
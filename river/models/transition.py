@@ -36,6 +36,10 @@ class Transition(BaseModel):
         app_label = 'river'
         verbose_name = _("Transition")
         verbose_name_plural = _("Transitions")
+        indexes = [
+            models.Index(fields=['object_id', 'workflow', 'status', 'source_state'], name='river_tr_object_idx'),
+            models.Index(fields=['workflow', 'status'], name='river_tr_workflow_idx'),
+        ]
 
     objects = TransitionApprovalManager()
     content_type = models.ForeignKey(app_config.CONTENT_TYPE_CLASS, verbose_name=_('Content Type'), on_delete=CASCADE)
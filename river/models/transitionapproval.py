@@ -1,6 +1,7 @@
 import logging
 
-from django.db.models import CASCADE, PROTECT, SET_NULL
+from django.db.models import CASCADE, PROTECT, SET_NULL, Q
+from django.db.models.signals import pre_save
 from mptt.fields import TreeOneToOneField
 
 from river.models import TransitionApprovalMeta, Workflow
@@ -15,6 +16,7 @@ from django.db import models
 from django.utils.translation import ugettext_lazy as _
 
 from river.models.base_model import BaseModel
+from river.models.indexes import PartialIndex
 from river.models.managers.transitionapproval import TransitionApprovalManager
 from river.config import app_config
 
@@ -30,21 +32,63 @@ STATUSES = [
     (JUMPED, _('Jumped')),
 ]
 
+INTEGER_TYPES = [
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+]
+
 LOGGER = logging.getLogger(__name__)
 
 
+class _TypedGenericForeignKey(GenericForeignKey):
+    """
+    Matches the prefetched workflow objects with the native type of their primary keys. Django 2.2 matches them with the
+    object ids as they are stored otherwise, which never equal the UUID primary keys.
+    """
+
+    def get_prefetch_queryset(self, instances, queryset=None):
+        querysets, rel_obj_attr, instance_attr, single, cache_name, is_descriptor = super(_TypedGenericForeignKey, self).get_prefetch_queryset(
+            instances, queryset)
+
+        def typed_instance_attr(instance):
+            key = instance_attr(instance)
+            if key is None:
+                return None
+            object_id, model = key
+            return model._meta.pk.to_python(object_id), model
+
+        return querysets, rel_obj_attr, typed_instance_attr, single, cache_name, is_descriptor
+
+
 class TransitionApproval(BaseModel):
     class Meta:
         app_label = 'river'
         verbose_name = _("Transition Approval")
         verbose_name_plural = _("Transition Approvals")
+        indexes = [
+            PartialIndex(fields=['workflow', 'status', 'object_id'], condition=Q(actionable=True), name='river_ta_actionable_idx'),
+            PartialIndex(fields=['workflow', 'object_id', 'transition'], condition=Q(status=PENDING), name='river_ta_pending_idx'),
+            models.Index(fields=['transition', 'priority'], name='river_ta_transition_idx'),
+            PartialIndex(fields=['content_type', 'object_id', 'transaction_date'], condition=Q(transaction_date__isnull=False), name='river_ta_recent_idx'),
+            models.Index(fields=['object_int_id', 'workflow'], name='river_ta_object_int_idx'),
+            models.Index(fields=['object_uuid', 'workflow'], name='river_ta_object_uuid_idx'),
+        ]
 
     objects = TransitionApprovalManager()
 
     content_type = models.ForeignKey(app_config.CONTENT_TYPE_CLASS, verbose_name=_('Content Type'), on_delete=CASCADE)
 
     object_id = models.CharField(max_length=50, verbose_name=_('Related Object'))
-    workflow_object = GenericForeignKey('content_type', 'object_id')
+    object_int_id = models.BigIntegerField(null=True, blank=True, editable=False, verbose_name=_('Related Object (Integer)'))
+    object_uuid = models.UUIDField(null=True, blank=True, editable=False, verbose_name=_('Related Object (UUID)'))
+    workflow_object = _TypedGenericForeignKey('content_type', 'object_id')
 
     meta = models.ForeignKey(TransitionApprovalMeta, verbose_name=_('Meta'), related_name="transition_approvals", null=True, blank=True, on_delete=SET_NULL)
     workflow = models.ForeignKey(Workflow, verbose_name=_("Workflow"), related_name='transition_approvals', on_delete=PROTECT)
@@ -59,9 +103,29 @@ class TransitionApproval(BaseModel):
     permissions = models.ManyToManyField(app_config.PERMISSION_CLASS, verbose_name=_('Permissions'))
     groups = models.ManyToManyField(app_config.GROUP_CLASS, verbose_name=_('Groups'))
     priority = models.IntegerField(default=0, verbose_name=_('Priority'))
+    actionable = models.BooleanField(_('Actionable'), default=False, editable=False)
 
     previous = TreeOneToOneField("self", verbose_name=_('Previous Transition'), related_name="next_transition", null=True, blank=True, on_delete=CASCADE)
 
+    @staticmethod
+    def typed_object_id_field(model_class):
+        """
+        Name of the column keeping the ids of the given model's objects with their native type, ``None`` when its primary
+        key is neither an integer nor a UUID.
+        """
+        pk = model_class._meta.pk
+        internal_type = (pk.target_field if pk.is_relation else pk).get_internal_type()
+        if internal_type in INTEGER_TYPES:
+            return "object_int_id"
+        elif internal_type == "UUIDField":
+            return "object_uuid"
+        return None
+
+    def set_typed_object_id(self, model_class):
+        typed_object_id_field = TransitionApproval.typed_object_id_field(model_class)
+        if typed_object_id_field:
+            setattr(self, typed_object_id_field, model_class._meta.pk.to_python(self.object_id))
+
     @property
     def peers(self):
         return TransitionApproval.objects.filter(
@@ -69,3 +133,13 @@ class TransitionApproval(BaseModel):
             workflow=self.workflow,
             transition=self.transition,
         ).exclude(pk=self.pk)
+
+
+def on_pre_save(sender, instance, *args, **kwargs):
+    if instance.content_type_id and instance.object_id is not None and instance.object_int_id is None and instance.object_uuid is None:
+        model_class = app_config.CONTENT_TYPE_CLASS.objects.get_for_id(instance.content_type_id).model_class()
+        if model_class:
+            instance.set_typed_object_id(model_class)
+
+
+pre_save.connect(on_pre_save, TransitionApproval)
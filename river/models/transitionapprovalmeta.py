@@ -2,7 +2,7 @@ from __future__ import unicode_literals
 
 from django.db import models, transaction
 from django.db.models import PROTECT
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
 from django.utils.translation import ugettext_lazy as _
 
 from river.config import app_config
@@ -58,9 +58,41 @@ def post_save_model(sender, instance, *args, **kwargs):
 
 @transaction.atomic
 def pre_delete_model(sender, instance, *args, **kwargs):
-    from river.models.transitionapproval import PENDING
-    instance.transition_approvals.filter(status=PENDING).delete()
+    from river.models.managers.transitionapproval import CHUNK_SIZE
+    from river.models.transitionapproval import PENDING, TransitionApproval
+
+    pending_approvals = instance.transition_approvals.filter(status=PENDING)
+    object_ids = sorted(set(pending_approvals.values_list("object_id", flat=True)))
+    pending_approvals.delete()
+
+    # The approvals waiting for the deleted ones on the same transitions may be actionable now.
+    workflow = instance.workflow
+    model_class = workflow.content_type.model_class()
+    if object_ids and model_class:
+        state_attname = model_class._meta.get_field(workflow.field_name).attname
+        for index in range(0, len(object_ids), CHUNK_SIZE):
+            TransitionApproval.objects.refresh_actionable(
+                workflow, dict(model_class._default_manager.filter(pk__in=object_ids[index:index + CHUNK_SIZE]).values_list("pk", state_attname))
+            )
+
+
+def on_definition_changed(sender, instance, *args, **kwargs):
+    Workflow.objects.bump_version(instance.workflow_id)
+
+
+def on_authorization_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    if action.startswith("post_"):
+        if not reverse:
+            Workflow.objects.bump_version(instance.workflow_id)
+        elif pk_set:
+            Workflow.objects.bump_version(*TransitionApprovalMeta.objects.filter(pk__in=pk_set).values_list("workflow_id", flat=True).distinct())
+        else:
+            Workflow.objects.bump_version(*Workflow.objects.values_list("pk", flat=True))
 
 
 post_save.connect(post_save_model, sender=TransitionApprovalMeta)
 pre_delete.connect(pre_delete_model, sender=TransitionApprovalMeta)
+post_save.connect(on_definition_changed, sender=TransitionApprovalMeta)
+post_delete.connect(on_definition_changed, sender=TransitionApprovalMeta)
+m2m_changed.connect(on_authorization_changed, sender=TransitionApprovalMeta.permissions.through)
+m2m_changed.connect(on_authorization_changed, sender=TransitionApprovalMeta.groups.through)
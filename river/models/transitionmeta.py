@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 
 from django.db import models
 from django.db.models import PROTECT
+from django.db.models.signals import post_save, post_delete
 from django.utils.translation import ugettext_lazy as _
 
 from river.models import State, Workflow
@@ -25,3 +26,11 @@ class TransitionMeta(BaseModel):
             self.source_state,
             self.destination_state
         )
+
+
+def on_definition_changed(sender, instance, *args, **kwargs):
+    Workflow.objects.bump_version(instance.workflow_id)
+
+
+post_save.connect(on_definition_changed, sender=TransitionMeta)
+post_delete.connect(on_definition_changed, sender=TransitionMeta)
@@ -1,5 +1,6 @@
 from django.db import models
-from django.db.models import PROTECT
+from django.db.models import PROTECT, F
+from django.db.models.signals import pre_save, post_save
 from django.utils.translation import ugettext_lazy as _
 
 from river.config import app_config
@@ -19,9 +20,32 @@ class Workflow(BaseModel):
     content_type = models.ForeignKey(app_config.CONTENT_TYPE_CLASS, verbose_name=_('Content Type'), on_delete=PROTECT)
     field_name = models.CharField(_("Field Name"), max_length=200)
     initial_state = models.ForeignKey(State, verbose_name=_("Initial State"), related_name='workflow_this_set_as_initial_state', on_delete=PROTECT)
+    version = models.IntegerField(verbose_name=_("Definition Version"), default=0)
+    lazy_approvals = models.BooleanField(
+        verbose_name=_("Lazy Approvals"), default=False,
+        help_text=_("Create the transitions and the approvals only for the current state of the objects instead of their whole future")
+    )
 
     def natural_key(self):
         return self.content_type, self.field_name
 
     def __str__(self):
         return "%s.%s" % (self.content_type.model, self.field_name)
+
+
+def on_pre_save(sender, instance, update_fields=None, *args, **kwargs):
+    if instance._state.adding:
+        return
+    if update_fields is None or "version" in update_fields:
+        instance.version = F("version") + 1
+    else:
+        Workflow.objects.bump_version(instance.pk)
+
+
+def on_post_save(sender, instance, created, *args, **kwargs):
+    if not created:
+        instance.refresh_from_db(fields=["version"])
+
+
+pre_save.connect(on_pre_save, Workflow)
+post_save.connect(on_post_save, Workflow)
@@ -4,7 +4,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.dispatch import Signal
 
-from river.models import Workflow
+from river.core.workflowgraph import workflow_graph_cache
 from river.models.hook import BEFORE, AFTER
 from river.models.on_approved_hook import OnApprovedHook
 from river.models.on_complete_hook import OnCompleteHook
@@ -22,26 +22,58 @@ post_approve = Signal(providing_args=["workflow_object", "field_name", "transiti
 LOGGER = logging.getLogger(__name__)
 
 
+class PrefetchedHooks(object):
+    """
+    The hooks which may be fired for the given objects of a workflow, fetched with one query per hook type, so that the
+    signals of many objects can be fired without querying the hooks object by object.
+    """
+
+    def __init__(self, workflow, content_type, object_ids):
+        object_q = Q(object_id__isnull=True) | Q(object_id__in=[str(object_id) for object_id in object_ids], content_type=content_type)
+        self.content_type = content_type
+        self.on_approved_hooks = list(OnApprovedHook.objects.filter(object_q, workflow=workflow).select_related("callback_function"))
+        self.on_transit_hooks = list(OnTransitHook.objects.filter(object_q, workflow=workflow).select_related("callback_function"))
+        self.on_complete_hooks = list(
+            OnCompleteHook.objects.filter(object_q, workflow=workflow).select_related("callback_function")
+        )
+
+    def on_approved(self, workflow_object, transition_approval, hook_type):
+        return [
+            hook for hook in self.on_approved_hooks
+            if self._is_for(hook, workflow_object, hook_type) and
+            hook.transition_approval_meta_id == transition_approval.meta_id and
+            hook.transition_approval_id in [None, transition_approval.pk]
+        ]
+
+    def on_transit(self, workflow_object, transition, hook_type):
+        return [
+            hook for hook in self.on_transit_hooks
+            if self._is_for(hook, workflow_object, hook_type) and
+            hook.transition_meta_id == transition.meta_id and
+            hook.transition_id in [None, transition.pk]
+        ]
+
+    def on_complete(self, workflow_object, hook_type):
+        return [hook for hook in self.on_complete_hooks if self._is_for(hook, workflow_object, hook_type)]
+
+    def _is_for(self, hook, workflow_object, hook_type):
+        return hook.hook_type == hook_type and \
+               (hook.object_id is None or (hook.object_id == str(workflow_object.pk) and hook.content_type_id == self.content_type.pk))
+
+
 class TransitionSignal(object):
-    def __init__(self, status, workflow_object, field_name, transition_approval):
+    def __init__(self, status, workflow_object, field_name, transition_approval, workflow=None, hooks=None):
         self.status = status
         self.workflow_object = workflow_object
         self.field_name = field_name
         self.transition_approval = transition_approval
         self.content_type = ContentType.objects.get_for_model(self.workflow_object.__class__)
-        self.workflow = Workflow.objects.get(content_type=self.content_type, field_name=self.field_name)
+        self.workflow = workflow or workflow_graph_cache.get(self.content_type, self.field_name).workflow
+        self.hooks = hooks
 
     def __enter__(self):
         if self.status:
-            for hook in OnTransitHook.objects.filter(
-                    (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
-                    (Q(transition__isnull=True) | Q(transition=self.transition_approval.transition)) &
-                    Q(
-                        workflow__field_name=self.field_name,
-                        transition_meta=self.transition_approval.transition.meta,
-                        hook_type=BEFORE
-                    )
-            ):
+            for hook in self._hooks(BEFORE):
                 hook.execute(self._get_context(BEFORE))
 
             LOGGER.debug("The signal that is fired right before the transition ( %s ) happened for %s"
@@ -49,19 +81,24 @@ class TransitionSignal(object):
 
     def __exit__(self, type, value, traceback):
         if self.status:
-            for hook in OnTransitHook.objects.filter(
-                    (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
-                    (Q(transition__isnull=True) | Q(transition=self.transition_approval.transition)) &
-                    Q(
-                        workflow=self.workflow,
-                        transition_meta=self.transition_approval.transition.meta,
-                        hook_type=AFTER
-                    )
-            ):
+            for hook in self._hooks(AFTER):
                 hook.execute(self._get_context(AFTER))
             LOGGER.debug("The signal that is fired right after the transition ( %s) happened for %s"
                          % (self.transition_approval.transition, self.workflow_object))
 
+    def _hooks(self, hook_type):
+        if self.hooks is not None:
+            return self.hooks.on_transit(self.workflow_object, self.transition_approval.transition, hook_type)
+        return OnTransitHook.objects.filter(
+            (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
+            (Q(transition__isnull=True) | Q(transition=self.transition_approval.transition)) &
+            Q(
+                workflow=self.workflow,
+                transition_meta_id=self.transition_approval.transition.meta_id,
+                hook_type=hook_type
+            )
+        )
+
     def _get_context(self, when):
         return {
             "hook": {
@@ -77,42 +114,40 @@ class TransitionSignal(object):
 
 
 class ApproveSignal(object):
-    def __init__(self, workflow_object, field_name, transition_approval):
+    def __init__(self, workflow_object, field_name, transition_approval, workflow=None, hooks=None):
         self.workflow_object = workflow_object
         self.field_name = field_name
         self.transition_approval = transition_approval
         self.content_type = ContentType.objects.get_for_model(self.workflow_object.__class__)
-        self.workflow = Workflow.objects.get(content_type=self.content_type, field_name=self.field_name)
+        self.workflow = workflow or workflow_graph_cache.get(self.content_type, self.field_name).workflow
+        self.hooks = hooks
 
     def __enter__(self):
-        for hook in OnApprovedHook.objects.filter(
-                (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
-                (Q(transition_approval__isnull=True) | Q(transition_approval=self.transition_approval)) &
-                Q(
-                    workflow__field_name=self.field_name,
-                    transition_approval_meta=self.transition_approval.meta,
-                    hook_type=BEFORE
-                )
-        ):
+        for hook in self._hooks(BEFORE):
             hook.execute(self._get_context(BEFORE))
 
         LOGGER.debug("The signal that is fired right before a transition approval is approved for %s due to transition %s -> %s" % (
             self.workflow_object, self.transition_approval.transition.source_state.label, self.transition_approval.transition.destination_state.label))
 
     def __exit__(self, type, value, traceback):
-        for hook in OnApprovedHook.objects.filter(
-                (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
-                (Q(transition_approval__isnull=True) | Q(transition_approval=self.transition_approval)) &
-                Q(
-                    workflow__field_name=self.field_name,
-                    transition_approval_meta=self.transition_approval.meta,
-                    hook_type=AFTER
-                )
-        ):
+        for hook in self._hooks(AFTER):
             hook.execute(self._get_context(AFTER))
         LOGGER.debug("The signal that is fired right after a transition approval is approved for %s due to transition %s -> %s" % (
             self.workflow_object, self.transition_approval.transition.source_state.label, self.transition_approval.transition.destination_state.label))
 
+    def _hooks(self, hook_type):
+        if self.hooks is not None:
+            return self.hooks.on_approved(self.workflow_object, self.transition_approval, hook_type)
+        return OnApprovedHook.objects.filter(
+            (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
+            (Q(transition_approval__isnull=True) | Q(transition_approval=self.transition_approval)) &
+            Q(
+                workflow__field_name=self.field_name,
+                transition_approval_meta_id=self.transition_approval.meta_id,
+                hook_type=hook_type
+            )
+        )
+
     def _get_context(self, when):
         return {
             "hook": {
@@ -128,38 +163,37 @@ class ApproveSignal(object):
 
 
 class OnCompleteSignal(object):
-    def __init__(self, workflow_object, field_name):
+    def __init__(self, workflow_object, field_name, workflow=None, status=None, hooks=None):
         self.workflow_object = workflow_object
         self.field_name = field_name
-        self.workflow = getattr(self.workflow_object.river, self.field_name)
-        self.status = self.workflow.on_final_state
+        self.status = getattr(self.workflow_object.river, self.field_name).on_final_state if status is None else status
         self.content_type = ContentType.objects.get_for_model(self.workflow_object.__class__)
-        self.workflow = Workflow.objects.get(content_type=self.content_type, field_name=self.field_name)
+        self.workflow = workflow or workflow_graph_cache.get(self.content_type, self.field_name).workflow
+        self.hooks = hooks
 
     def __enter__(self):
         if self.status:
-            for hook in OnCompleteHook.objects.filter(
-                    (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
-                    Q(
-                        workflow__field_name=self.field_name,
-                        hook_type=BEFORE
-                    )
-            ):
+            for hook in self._hooks(BEFORE):
                 hook.execute(self._get_context(BEFORE))
             LOGGER.debug("The signal that is fired right before the workflow of %s is complete" % self.workflow_object)
 
     def __exit__(self, type, value, traceback):
         if self.status:
-            for hook in OnCompleteHook.objects.filter(
-                    (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
-                    Q(
-                        workflow__field_name=self.field_name,
-                        hook_type=AFTER
-                    )
-            ):
+            for hook in self._hooks(AFTER):
                 hook.execute(self._get_context(AFTER))
             LOGGER.debug("The signal that is fired right after the workflow of %s is complete" % self.workflow_object)
 
+    def _hooks(self, hook_type):
+        if self.hooks is not None:
+            return self.hooks.on_complete(self.workflow_object, hook_type)
+        return OnCompleteHook.objects.filter(
+            (Q(object_id__isnull=True) | Q(object_id=self.workflow_object.pk, content_type=self.content_type)) &
+            Q(
+                workflow=self.workflow,
+                hook_type=hook_type
+            )
+        )
+
     def _get_context(self, when):
         return {
             "hook": {
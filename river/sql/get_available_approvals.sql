@@ -0,0 +1,14 @@
+SELECT river_transitionapproval.id
+FROM river_transitionapproval
+WHERE river_transitionapproval.workflow_id = %s
+  AND river_transitionapproval.status = 'pending'
+  AND {actionable}
+  AND (river_transitionapproval.transactioner_id IS NULL OR river_transitionapproval.transactioner_id = %s)
+  AND (
+        NOT EXISTS(SELECT 1 FROM river_transitionapproval_permissions tap WHERE tap.transitionapproval_id = river_transitionapproval.id)
+        OR EXISTS(SELECT 1 FROM river_transitionapproval_permissions tap WHERE tap.transitionapproval_id = river_transitionapproval.id AND tap.permission_id IN ({permission_ids}))
+    )
+  AND (
+        NOT EXISTS(SELECT 1 FROM river_transitionapproval_groups tag WHERE tag.transitionapproval_id = river_transitionapproval.id)
+        OR EXISTS(SELECT 1 FROM river_transitionapproval_groups tag WHERE tag.transitionapproval_id = river_transitionapproval.id AND tag.group_id IN ({group_ids}))
+    )
@@ -0,0 +1,85 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from hamcrest import assert_that, equal_to, contains_inanyorder, empty
+from mock import patch
+
+from river.config import app_config
+from river.core.authorizationsignature import authorization_signature_cache
+from river.models.factories import PermissionObjectFactory, UserObjectFactory, GroupObjectFactory
+
+
+# noinspection PyMethodMayBeStatic,DuplicatedCode
+class AuthorizationSignatureTest(TestCase):
+
+    def test_shouldResolveTheSignatureOncePerUserObject(self):
+        permission = PermissionObjectFactory()
+        group = GroupObjectFactory(permissions=[PermissionObjectFactory()])
+        user = UserObjectFactory(user_permissions=[permission], groups=[group])
+
+        signature = authorization_signature_cache.get(user)
+        assert_that(signature.permission_ids, contains_inanyorder(permission.pk, *group.permissions.values_list("pk", flat=True)))
+        assert_that(signature.group_ids, equal_to([group.pk]))
+
+        with self.assertNumQueries(0):
+            assert_that(authorization_signature_cache.get(user), equal_to(signature))
+
+        user.groups.remove(group)
+        assert_that(authorization_signature_cache.get(user).group_ids, empty())
+
+    def test_shouldShareTheSignatureThroughTheCacheUntilTheAuthorizationOfTheUserChanges(self):
+        permission = PermissionObjectFactory()
+        group = GroupObjectFactory()
+        user = UserObjectFactory()
+
+        with patch.dict(app_config.settings, {"CACHE_ALIAS": "default"}):
+            assert_that(authorization_signature_cache.get(user), equal_to(([], [])))
+            with self.assertNumQueries(0):
+                assert_that(authorization_signature_cache.get(_fresh(user)), equal_to(([], [])))
+
+            group.user_set.add(user)
+            assert_that(authorization_signature_cache.get(_fresh(user)), equal_to(([], [group.pk])))
+
+            group.permissions.add(permission)
+            assert_that(authorization_signature_cache.get(_fresh(user)), equal_to(([permission.pk], [group.pk])))
+
+            permission.group_set.clear()
+            assert_that(authorization_signature_cache.get(_fresh(user)).permission_ids, empty())
+
+            permission.user_set.add(user)
+            assert_that(authorization_signature_cache.get(_fresh(user)).permission_ids, equal_to([permission.pk]))
+        caches["default"].clear()
+
+    def test_shouldResolveTheSignaturesInBulkOnlyWhenTheBackendsResolveThePermissionsLikeModelBackend(self):
+        permission = PermissionObjectFactory()
+        group = GroupObjectFactory(permissions=[PermissionObjectFactory()])
+        staff_user = UserObjectFactory(is_staff=True, groups=[group])
+        user = UserObjectFactory(user_permissions=[permission])
+        all_permission_ids = list(app_config.PERMISSION_CLASS.objects.values_list("pk", flat=True).order_by("pk"))
+
+        with override_settings(AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.AllowAllUsersModelBackend"]):
+            signatures = authorization_signature_cache.get_many([_fresh(staff_user), _fresh(user)])
+            assert_that(signatures[staff_user.pk], equal_to((list(group.permissions.values_list("pk", flat=True)), [group.pk])))
+            assert_that(signatures[user.pk], equal_to(([permission.pk], [])))
+
+        with override_settings(AUTHENTICATION_BACKENDS=["river.tests.core.test__authorization_signature.StaffBackend"]):
+            signatures = authorization_signature_cache.get_many([_fresh(staff_user), _fresh(user)])
+            assert_that(signatures[staff_user.pk], equal_to((all_permission_ids, [group.pk])))
+            assert_that(signatures[user.pk], equal_to(([permission.pk], [])))
+
+
+class StaffBackend(ModelBackend):
+    """
+    Grants the staff users all the permissions on top of the ones given to them.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        permissions = super(StaffBackend, self).get_all_permissions(user_obj, obj=obj)
+        if user_obj.is_active and user_obj.is_staff:
+            permissions = permissions | {"%s.%s" % (app_label, codename) for app_label, codename in app_config.PERMISSION_CLASS.objects.values_list("content_type__app_label", "codename")}
+        return permissions
+
+
+def _fresh(user):
+    return User(pk=user.pk, username=user.username, is_active=user.is_active, is_staff=user.is_staff, is_superuser=user.is_superuser)
@@ -1,11 +1,20 @@
 from datetime import datetime, timedelta
 
+from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
-from hamcrest import assert_that, equal_to, has_item, all_of, has_property, less_than, has_items, has_length
+from django.test.utils import CaptureQueriesContext
+from hamcrest import assert_that, equal_to, has_item, all_of, has_property, less_than, has_items, has_length, contains_inanyorder, none, contains_string, calling, raises
+from mock import patch
 
+from river.config import app_config
+from river.models import TransitionApproval, Transition, JUMPED, CANCELLED
 from river.models.factories import PermissionObjectFactory, UserObjectFactory, StateObjectFactory, GroupObjectFactory
-from river.tests.models import BasicTestModel
+from river.tests.models import BasicTestModel, ModelWithUUIDPrimaryKey, ModelWithStringPrimaryKey
+from river.utils.error_code import ErrorCode
+from river.utils.exceptions import RiverException
 # noinspection PyMethodMayBeStatic,DuplicatedCode
 from rivertest.flowbuilder import RawState, AuthorizationPolicyBuilder, FlowBuilder
 
@@ -144,3 +153,472 @@ class ClassApiTest(TestCase):
                 flow.get_state(state32)
             )
         )
+
+    def test_shouldInitializeObjectsCreatedInBulk(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(0) \
+            .build()
+
+        BasicTestModel.objects.bulk_create([BasicTestModel(test_field=str(i)) for i in range(5)])
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=authorized_user), has_length(0))
+
+        initialized = BasicTestModel.river.my_field.bulk_initialize(BasicTestModel.objects.all(), batch_size=2)
+        assert_that(initialized, equal_to(5))
+
+        assert_that(BasicTestModel.objects.filter(my_field=flow.get_state(state1)), has_length(5))
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=authorized_user), has_length(5))
+        for workflow_object in BasicTestModel.objects.all():
+            assert_that(TransitionApproval.objects.filter(workflow=flow.workflow, workflow_object=workflow_object), has_length(2))
+
+        assert_that(BasicTestModel.river.my_field.bulk_initialize(BasicTestModel.objects.all()), equal_to(0))
+        assert_that(TransitionApproval.objects.filter(workflow=flow.workflow), has_length(10))
+
+    def test_shouldInitializeObjectsInBulkWhenTheLookupsOfTheInsertedRowsAreChunked(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(0) \
+            .build()
+
+        BasicTestModel.objects.bulk_create([BasicTestModel(test_field=str(i)) for i in range(5)])
+        with patch("river.core.approvalmaterializer.LOOKUP_CHUNK_SIZE", 2):
+            BasicTestModel.river.my_field.bulk_initialize(BasicTestModel.objects.all())
+
+        approvals = TransitionApproval.objects.filter(workflow=flow.workflow).select_related("transition")
+        assert_that(approvals, has_length(10))
+        for approval in approvals:
+            assert_that(approval.transition.object_id, equal_to(approval.object_id))
+            assert_that(approval.transition.meta.transition_approval_meta.get().pk, equal_to(approval.meta_id))
+            assert_that(list(approval.permissions.all()), equal_to([authorized_permission]))
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=authorized_user), has_length(5))
+
+    def test_shouldRefreshTheActionableApprovalsOfManyObjectsInChunks(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(0) \
+            .build()
+
+        BasicTestModel.objects.bulk_create([BasicTestModel(test_field=str(i)) for i in range(5)])
+        with patch("river.models.managers.transitionapproval.CHUNK_SIZE", 2):
+            BasicTestModel.river.my_field.bulk_initialize(BasicTestModel.objects.all())
+            assert_that(TransitionApproval.objects.filter(workflow=flow.workflow, actionable=True), has_length(5))
+
+            BasicTestModel.river.my_field.jump_many(BasicTestModel.objects.all(), flow.get_state(state2))
+            actionable_approvals = TransitionApproval.objects.filter(workflow=flow.workflow, actionable=True)
+            assert_that(actionable_approvals, has_length(5))
+            assert_that({approval.transition.source_state for approval in actionable_approvals}, equal_to({flow.get_state(state2)}))
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=authorized_user), has_length(5))
+
+    def test_shouldSetTheInitialStateOfTheGivenObjectsWhenInitializedInBulk(self):
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2) \
+            .with_objects(0) \
+            .build()
+
+        workflow_objects = BasicTestModel.objects.bulk_create([BasicTestModel(test_field=str(i)) for i in range(3)])
+        if not all(workflow_object.pk for workflow_object in workflow_objects):
+            assert_that(calling(BasicTestModel.river.my_field.bulk_initialize).with_args(workflow_objects), raises(ValueError))
+            assert_that(Transition.objects.filter(workflow=flow.workflow), has_length(0))
+            workflow_objects = list(BasicTestModel.objects.all())
+
+        BasicTestModel.river.my_field.bulk_initialize(workflow_objects)
+
+        for workflow_object in workflow_objects:
+            assert_that(workflow_object.my_field, equal_to(flow.get_state(state1)))
+            assert_that(Transition.objects.filter(workflow=flow.workflow, workflow_object=workflow_object), has_length(1))
+
+    def test_shouldKeepTheObjectIdsOfTheApprovalsWithTheirNativeTypes(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        integer_flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_objects(2) \
+            .build()
+        uuid_flow = FlowBuilder("status", ContentType.objects.get_for_model(ModelWithUUIDPrimaryKey)) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_object_factory(lambda: ModelWithUUIDPrimaryKey.objects.create()) \
+            .with_objects(2) \
+            .build()
+        string_flow = FlowBuilder("status", ContentType.objects.get_for_model(ModelWithStringPrimaryKey)) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_object_factory(lambda: ModelWithStringPrimaryKey.objects.create(custom_pk="object-1")) \
+            .build()
+
+        for approval in TransitionApproval.objects.filter(workflow=integer_flow.workflow):
+            assert_that(approval.object_int_id, equal_to(int(approval.object_id)))
+            assert_that(approval.object_uuid, none())
+        for approval in TransitionApproval.objects.filter(workflow=uuid_flow.workflow):
+            assert_that(str(approval.object_uuid), equal_to(approval.object_id))
+            assert_that(approval.object_int_id, none())
+        for approval in TransitionApproval.objects.filter(workflow=string_flow.workflow):
+            assert_that(approval.object_int_id, none())
+            assert_that(approval.object_uuid, none())
+
+        with CaptureQueriesContext(connection) as queries:
+            assert_that(list(BasicTestModel.river.my_field.get_on_approval_objects(as_user=authorized_user)), contains_inanyorder(*integer_flow.objects))
+        assert_that(queries.captured_queries[-1]["sql"], all_of(contains_string("IN (SELECT"), contains_string("object_int_id")))
+        assert_that(ModelWithUUIDPrimaryKey.river.status.get_on_approval_objects(as_user=authorized_user), contains_inanyorder(*uuid_flow.objects))
+        assert_that(ModelWithStringPrimaryKey.river.status.get_on_approval_objects(as_user=authorized_user), contains_inanyorder(*string_flow.objects))
+
+    def test_shouldEmbedTheApprovalsIntoTheOnApprovalObjectsAsASubquery(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        object_ids = iter(["object-1", "object-2", "object-3"])
+        flow = FlowBuilder("status", ContentType.objects.get_for_model(ModelWithStringPrimaryKey)) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_object_factory(lambda: ModelWithStringPrimaryKey.objects.create(custom_pk=next(object_ids))) \
+            .with_objects(3) \
+            .build()
+
+        on_approval_objects = ModelWithStringPrimaryKey.river.status.get_on_approval_objects(as_user=authorized_user).order_by("-pk")
+        with CaptureQueriesContext(connection) as queries:
+            assert_that(list(on_approval_objects[:2]), equal_to(sorted(flow.objects, key=lambda workflow_object: workflow_object.pk, reverse=True)[:2]))
+        assert_that(queries.captured_queries, has_length(1))
+        assert_that(queries.captured_queries[0]["sql"], contains_string("EXISTS"))
+
+    def test_shouldWalkTheAvailableApprovalsPageByPage(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]) \
+            .with_transition(state1, state3, [AuthorizationPolicyBuilder().with_priority(1).with_permission(authorized_permission).build()]) \
+            .with_objects(3) \
+            .build()
+
+        expected = sorted(
+            TransitionApproval.objects.filter(workflow=flow.workflow),
+            key=lambda approval: (approval.priority, approval.object_id, approval.pk)
+        )
+
+        pages = list(BasicTestModel.river.my_field.iter_available_approvals(as_user=authorized_user, page_size=4))
+        assert_that([len(page.approvals) for page in pages], equal_to([4, 2]))
+        assert_that([approval for page in pages for approval in page.approvals], equal_to(expected))
+
+        resumed = BasicTestModel.river.my_field.iter_available_approvals(as_user=authorized_user, page_size=4, after=pages[0].cursor)
+        assert_that(next(resumed).approvals, equal_to(expected[4:]))
+        assert_that(list(resumed), has_length(0))
+
+    def test_shouldRejectAMalformedCursor(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]) \
+            .with_objects(1) \
+            .build()
+
+        for cursor in ["not base64!", "_-8=", "bm90IGpzb24=", "WzEsIDJd", "é"]:
+            pages = BasicTestModel.river.my_field.iter_available_approvals(as_user=authorized_user, after=cursor)
+            assert_that(calling(next).with_args(pages), raises(RiverException, "Invalid cursor"))
+
+    def test_shouldCountTheOnApprovalObjectsByTheirStates(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        authorization_policies = [
+            AuthorizationPolicyBuilder().with_permission(authorized_permission).build(),
+            AuthorizationPolicyBuilder().with_priority(1).with_permission(authorized_permission).build(),
+        ]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(3) \
+            .build()
+
+        flow.objects[0].river.my_field.approve(as_user=authorized_user)
+        flow.objects[0].river.my_field.approve(as_user=authorized_user)
+
+        class_workflow = BasicTestModel.river.my_field
+        with self.assertNumQueries(1):
+            counts = class_workflow.count_on_approval_objects(as_user=authorized_user)
+        assert_that(counts, equal_to({flow.get_state(state1): 2, flow.get_state(state2): 1}))
+
+        with patch.dict(app_config.settings, {"CACHE_ALIAS": "default"}):
+            BasicTestModel.river.my_field.count_on_approval_objects(as_user=authorized_user, cache_timeout=30)
+            with self.assertNumQueries(0):
+                counts = BasicTestModel.river.my_field.count_on_approval_objects(as_user=authorized_user, cache_timeout=30)
+            assert_that(counts, equal_to({flow.get_state(state1): 2, flow.get_state(state2): 1}))
+        caches["default"].clear()
+
+    def test_shouldCountNothingWhenThereIsNoWorkflow(self):
+        user = UserObjectFactory()
+        BasicTestModel.objects.create()
+
+        assert_that(BasicTestModel.river.my_field.count_on_approval_objects(as_user=user), equal_to({}))
+        with patch.dict(app_config.settings, {"CACHE_ALIAS": "default"}):
+            assert_that(BasicTestModel.river.my_field.count_on_approval_objects(as_user=user, cache_timeout=30), equal_to({}))
+        caches["default"].clear()
+
+    def test_shouldResolveTheAvailableApprovalsOfManyUsersAtOnce(self):
+        permission = PermissionObjectFactory()
+        group = GroupObjectFactory()
+        users = [
+            UserObjectFactory(user_permissions=[permission]),
+            UserObjectFactory(groups=[group]),
+            UserObjectFactory(groups=[GroupObjectFactory(permissions=[permission])]),
+            UserObjectFactory(user_permissions=[permission], groups=[group]),
+            UserObjectFactory(user_permissions=[permission], is_active=False),
+            UserObjectFactory(is_superuser=True),
+            UserObjectFactory(),
+        ]
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+        state4 = RawState("state4")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(permission).build()]) \
+            .with_transition(state1, state3, [AuthorizationPolicyBuilder().with_group(group).build()]) \
+            .with_transition(state1, state4, [AuthorizationPolicyBuilder().with_permission(permission).with_group(group).build()]) \
+            .with_objects(3) \
+            .build()
+        TransitionApproval.objects.filter(workflow=flow.workflow, object_id=flow.objects[0].pk).update(transactioner=users[0])
+
+        users = list(User.objects.filter(pk__in=[user.pk for user in users]))
+        class_workflow = BasicTestModel.river.my_field
+        with self.assertNumQueries(7):
+            approval_ids_by_user = class_workflow.get_available_approval_ids_by_user(users)
+
+        for user in users:
+            expected = BasicTestModel.river.my_field.get_available_approvals(as_user=user).values_list("pk", flat=True)
+            assert_that(approval_ids_by_user[user], equal_to(sorted(set(expected))))
+
+    def test_shouldPrefetchTheWorkflowStatusOfTheObjects(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(6) \
+            .build()
+
+        flow.objects[0].river.my_field.approve(as_user=authorized_user)
+        flow.objects[1].river.my_field.approve(as_user=authorized_user)
+        flow.objects[1].river.my_field.approve(as_user=authorized_user)
+
+        def status_of(workflow_object):
+            return (
+                list(workflow_object.river.my_field.get_available_states(as_user=authorized_user)),
+                workflow_object.river.my_field.on_final_state,
+                list(workflow_object.river.my_field.next_approvals),
+                workflow_object.river.my_field.recent_approval,
+            )
+
+        expected = [status_of(workflow_object) for workflow_object in BasicTestModel.objects.order_by("pk")]
+
+        class_workflow = BasicTestModel.river.my_field
+        with CaptureQueriesContext(connection) as few_objects_queries:
+            class_workflow.prefetch(BasicTestModel.objects.order_by("pk")[:2], as_user=authorized_user)
+        with CaptureQueriesContext(connection) as all_objects_queries:
+            workflow_objects = class_workflow.prefetch(BasicTestModel.objects.order_by("pk"), as_user=authorized_user)
+        assert_that(all_objects_queries.captured_queries, has_length(len(few_objects_queries.captured_queries)))
+
+        with self.assertNumQueries(0):
+            statuses = [status_of(workflow_object) for workflow_object in workflow_objects]
+        assert_that(statuses, equal_to(expected))
+
+        workflow_objects[0].river.my_field.approve(as_user=authorized_user)
+        assert_that(workflow_objects[0].river.my_field.on_final_state, equal_to(True))
+        assert_that(list(workflow_objects[0].river.my_field.get_available_states(as_user=authorized_user)), equal_to([]))
+
+    def test_shouldAnnotateAndFilterTheObjectsByTheirWorkflowStatus(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_group = GroupObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission], groups=[authorized_group])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]) \
+            .with_transition(state2, state3, [AuthorizationPolicyBuilder().with_group(authorized_group).build()]) \
+            .with_objects(3) \
+            .build()
+
+        on_state1, on_state2, on_state3 = flow.objects
+        on_state2.river.my_field.approve(as_user=authorized_user)
+        on_state3.river.my_field.approve(as_user=authorized_user)
+        on_state3.river.my_field.approve(as_user=authorized_user)
+        TransitionApproval.objects.filter(object_id=on_state3.pk).update(transaction_date=datetime.now() - timedelta(days=10))
+
+        class_workflow = BasicTestModel.river.my_field
+        with CaptureQueriesContext(connection) as queries:
+            workflow_objects = list(
+                class_workflow.annotate_last_transaction_date(class_workflow.annotate_is_final(BasicTestModel.objects.all())).order_by("pk")
+            )
+        assert_that(queries.captured_queries, has_length(1))
+        assert_that([workflow_object.is_final for workflow_object in workflow_objects], equal_to([False, False, True]))
+        assert_that(workflow_objects[0].last_transaction_date, none())
+        assert_that(workflow_objects[2].last_transaction_date, less_than(workflow_objects[1].last_transaction_date))
+
+        stale_objects = class_workflow.annotate_last_transaction_date(BasicTestModel.objects.all()).filter(
+            last_transaction_date__lt=datetime.now() - timedelta(days=5)
+        )
+        assert_that(stale_objects, contains_inanyorder(on_state3))
+
+        assert_that(class_workflow.filter_awaiting(BasicTestModel.objects.all(), as_user=authorized_user), contains_inanyorder(on_state1, on_state2))
+        assert_that(class_workflow.filter_awaiting_group(BasicTestModel.objects.all(), authorized_group), contains_inanyorder(on_state2))
+
+    def test_shouldApproveManyObjectsAtOnce(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(5) \
+            .build()
+
+        completed = flow.objects[0]
+        completed.river.my_field.approve(as_user=authorized_user)
+        completed.river.my_field.approve(as_user=authorized_user)
+
+        class_workflow = BasicTestModel.river.my_field
+        with CaptureQueriesContext(connection) as one_object_queries:
+            class_workflow.approve_many(flow.objects[1:2], as_user=authorized_user)
+        with CaptureQueriesContext(connection) as many_objects_queries:
+            results = class_workflow.approve_many([completed] + flow.objects[2:], as_user=authorized_user)
+        assert_that(many_objects_queries.captured_queries, has_length(len(one_object_queries.captured_queries)))
+
+        assert_that([result.workflow_object for result in results], equal_to([completed] + flow.objects[2:]))
+        assert_that(results[0].approval, none())
+        assert_that(results[0].error.code, equal_to(ErrorCode.NO_AVAILABLE_NEXT_STATE_FOR_USER))
+        for result in results[1:]:
+            assert_that(result.error, none())
+            assert_that(result.approval.transactioner, equal_to(authorized_user))
+            assert_that(result.workflow_object.my_field, equal_to(flow.get_state(state2)))
+        assert_that(BasicTestModel.objects.filter(my_field=flow.get_state(state2)), has_length(4))
+
+        results = class_workflow.approve_many(BasicTestModel.objects.filter(my_field=flow.get_state(state2)), as_user=authorized_user)
+        assert_that([result.error for result in results], equal_to([None] * 4))
+        assert_that(BasicTestModel.objects.filter(my_field=flow.get_state(state3)), has_length(5))
+        for result in results:
+            assert_that(result.approval.previous.transition.source_state, equal_to(flow.get_state(state1)))
+            assert_that(result.workflow_object.river.my_field.on_final_state, equal_to(True))
+
+    def test_shouldApproveNothingWhenThereIsNoWorkflow(self):
+        user = UserObjectFactory()
+        workflow_objects = [BasicTestModel.objects.create(), BasicTestModel.objects.create()]
+
+        assert_that(BasicTestModel.river.my_field.approve_many(workflow_objects, as_user=user), has_length(0))
+        assert_that(BasicTestModel.river.my_field.approve_many(BasicTestModel.objects.all(), as_user=user), has_length(0))
+
+    def test_shouldJumpManyObjectsAtOnce(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(4) \
+            .build()
+
+        flow.objects[0].river.my_field.approve(as_user=authorized_user)
+
+        class_workflow = BasicTestModel.river.my_field
+        assert_that(class_workflow.jump_many(flow.objects[1:], flow.get_state(state2)), equal_to(3))
+        for workflow_object in flow.objects:
+            assert_that(workflow_object.my_field, equal_to(flow.get_state(state2)))
+        assert_that(class_workflow.get_on_approval_objects(as_user=authorized_user), has_length(4))
+
+        assert_that(class_workflow.jump_many(BasicTestModel.objects.all(), flow.get_state(state3), batch_size=3), equal_to(4))
+        assert_that(BasicTestModel.objects.filter(my_field=flow.get_state(state3)), has_length(4))
+        assert_that(TransitionApproval.objects.filter(workflow=flow.workflow, status=JUMPED), has_length(7))
+        assert_that(class_workflow.get_on_approval_objects(as_user=authorized_user), has_length(0))
+
+        assert_that(class_workflow.jump_many(BasicTestModel.objects.all(), flow.get_state(state2)), equal_to(0))
+
+    def test_shouldCancelManyObjectsAtOnce(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(3) \
+            .build()
+
+        flow.objects[0].river.my_field.approve(as_user=authorized_user)
+
+        class_workflow = BasicTestModel.river.my_field
+        cancelled = class_workflow.cancel_many(BasicTestModel.objects.filter(pk__in=[flow.objects[0].pk, flow.objects[1].pk]))
+        assert_that(cancelled, equal_to(3))
+
+        assert_that(class_workflow.get_on_approval_objects(as_user=authorized_user), contains_inanyorder(flow.objects[2]))
+        assert_that(TransitionApproval.objects.filter(workflow=flow.workflow, status=CANCELLED), has_length(3))
+        assert_that(BasicTestModel.objects.get(pk=flow.objects[0].pk).my_field, equal_to(flow.get_state(state2)))
@@ -0,0 +1,65 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from hamcrest import assert_that, has_length
+from mock import patch
+
+import river.tests.core.test__class_api as class_api
+import river.tests.core.test__instance_api as instance_api
+from river.core.classworkflowobject import ClassWorkflowObject
+from river.driver.orm_driver import OrmDriver
+from river.driver.sql_driver import SqlDriver
+from river.models.factories import UserObjectFactory
+from river.tests.models import BasicTestModel
+
+
+def with_driver(driver_class):
+    """
+    Runs the decorated test case with the given driver, skipping it on the databases the driver doesn't support.
+    """
+
+    def decorator(test_case_class):
+        test_case_class = patch.object(ClassWorkflowObject, "_river_driver_class", new=property(lambda self: driver_class))(test_case_class)
+        return skipUnless(driver_class.vendors is None or connection.vendor in driver_class.vendors, "%s doesn't run on %s" % (driver_class.__name__, connection.vendor))(test_case_class)
+
+    return decorator
+
+
+# noinspection PyMethodMayBeStatic
+class NoWorkflowTest(TestCase):
+
+    def test_shouldReturnNoApprovalsWhenThereIsNoWorkflow(self):
+        user = UserObjectFactory()
+        assert_that(BasicTestModel.river.my_field.get_available_approvals(as_user=user), has_length(0))
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=user), has_length(0))
+
+
+@with_driver(OrmDriver)
+class OrmDriverInstanceApiTest(instance_api.InstanceApiTest):
+    pass
+
+
+@with_driver(OrmDriver)
+class OrmDriverClassApiTest(class_api.ClassApiTest):
+    pass
+
+
+@with_driver(SqlDriver)
+class SqlDriverInstanceApiTest(instance_api.InstanceApiTest):
+    pass
+
+
+@with_driver(SqlDriver)
+class SqlDriverClassApiTest(class_api.ClassApiTest):
+    pass
+
+
+@with_driver(OrmDriver)
+class OrmDriverNoWorkflowTest(NoWorkflowTest):
+    pass
+
+
+@with_driver(SqlDriver)
+class SqlDriverNoWorkflowTest(NoWorkflowTest):
+    pass
@@ -0,0 +1,141 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from hamcrest import assert_that, equal_to, has_length, contains_inanyorder, empty, contains_string
+from mock import patch
+
+from river.config import app_config
+from river.models import InboxEntry
+from river.models.factories import PermissionObjectFactory, UserObjectFactory, GroupObjectFactory
+from river.tests.models import BasicTestModel
+# noinspection PyMethodMayBeStatic,DuplicatedCode
+from rivertest.flowbuilder import RawState, AuthorizationPolicyBuilder, FlowBuilder
+
+
+@patch.dict(app_config.settings, {"INBOX_ENABLED": True})
+class InboxTest(TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(InboxTest, self).__init__(*args, **kwargs)
+        self.content_type = ContentType.objects.get_for_model(BasicTestModel)
+
+    def test_shouldFanOutTheActionableApprovalsToTheirPrincipals(self):
+        permission1 = PermissionObjectFactory()
+        permission2 = PermissionObjectFactory()
+        group = GroupObjectFactory()
+        user_with_permission = UserObjectFactory(user_permissions=[permission1])
+        user_in_group = UserObjectFactory(groups=[group])
+        unauthorized_user = UserObjectFactory()
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(permission1).with_permission(permission2).build()]) \
+            .with_transition(state2, state3, [AuthorizationPolicyBuilder().with_group(group).build()]) \
+            .build()
+
+        workflow_object = flow.objects[0]
+
+        assert_that(InboxEntry.objects.filter(workflow=flow.workflow), has_length(2))
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=user_with_permission), equal_to([workflow_object]))
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=user_in_group), empty())
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=unauthorized_user), empty())
+
+        workflow_object.river.my_field.approve(as_user=user_with_permission)
+
+        assert_that(InboxEntry.objects.filter(workflow=flow.workflow), has_length(1))
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=user_with_permission), empty())
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=user_in_group), equal_to([workflow_object]))
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=user_in_group), contains_inanyorder(workflow_object))
+
+        workflow_object.river.my_field.approve(as_user=user_in_group)
+        assert_that(InboxEntry.objects.filter(workflow=flow.workflow), has_length(0))
+
+    def test_shouldFanOutTheApprovalsRestrictedOnMoreThanOneDimensionToTheUsers(self):
+        permission = PermissionObjectFactory()
+        group = GroupObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[permission], groups=[group])
+        user_with_permission_only = UserObjectFactory(user_permissions=[permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(permission).with_group(group).build()]) \
+            .build()
+
+        workflow_object = flow.objects[0]
+
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=authorized_user), equal_to([workflow_object]))
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=user_with_permission_only), empty())
+
+        user_with_permission_only.groups.add(group)
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=user_with_permission_only), equal_to([workflow_object]))
+
+        authorized_user.groups.remove(group)
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=authorized_user), empty())
+
+        group.user_set.clear()
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=user_with_permission_only), empty())
+
+    def test_shouldPaginateTheInboxByTheObjectIds(self):
+        permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(permission).build()]) \
+            .with_objects(5) \
+            .build()
+
+        workflow_objects = sorted(flow.objects, key=lambda workflow_object: str(workflow_object.pk))
+
+        first_page = BasicTestModel.river.my_field.get_inbox(as_user=authorized_user, limit=2)
+        assert_that(first_page, equal_to(workflow_objects[:2]))
+
+        second_page = BasicTestModel.river.my_field.get_inbox(as_user=authorized_user, after=first_page[-1].pk, limit=2)
+        assert_that(second_page, equal_to(workflow_objects[2:4]))
+
+        last_page = BasicTestModel.river.my_field.get_inbox(as_user=authorized_user, after=second_page[-1].pk, limit=2)
+        assert_that(last_page, equal_to(workflow_objects[4:]))
+
+    def test_shouldRebuildTheInbox(self):
+        permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(permission).build()]) \
+            .with_objects(3) \
+            .build()
+
+        InboxEntry.objects.all().delete()
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=authorized_user), empty())
+
+        BasicTestModel.river.my_field.rebuild_inbox()
+        assert_that(BasicTestModel.river.my_field.get_inbox(as_user=authorized_user), contains_inanyorder(*flow.objects))
+
+    def test_shouldEmbedTheInboxEntriesIntoTheOnApprovalObjectsAsASubquery(self):
+        permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(permission).build()]) \
+            .with_objects(3) \
+            .build()
+
+        on_approval_objects = BasicTestModel.river.my_field.get_on_approval_objects(as_user=authorized_user)
+        with CaptureQueriesContext(connection) as queries:
+            assert_that(list(on_approval_objects.order_by("pk")[1:]), equal_to(sorted(flow.objects, key=lambda workflow_object: workflow_object.pk)[1:]))
+        assert_that(queries.captured_queries, has_length(1))
+        assert_that(queries.captured_queries[0]["sql"], contains_string("EXISTS"))
@@ -1,11 +1,15 @@
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from hamcrest import assert_that, equal_to, has_item, has_property, raises, calling, has_length, is_not, all_of, none
 
-from river.models import TransitionApproval, PENDING, CANCELLED, APPROVED, Transition, JUMPED
-from river.models.factories import UserObjectFactory, PermissionObjectFactory
+from river.core.authorizationsignature import authorization_signature_cache
+from river.core.instanceworkflowobject import pick_approval
+from river.models import TransitionApproval, PENDING, CANCELLED, APPROVED, Transition, JUMPED, State
+from river.models.factories import UserObjectFactory, PermissionObjectFactory, GroupObjectFactory
 from river.tests.matchers import has_approval
-from river.tests.models import BasicTestModel, ModelWithTwoStateFields, ModelWithStringPrimaryKey
+from river.tests.models import BasicTestModel, ModelWithTwoStateFields, ModelWithStringPrimaryKey, BasicTestModelWithoutAdmin
 from river.tests.models.factories import ModelWithTwoStateFieldsObjectFactory
 from river.utils.exceptions import RiverException
 # noinspection PyMethodMayBeStatic,DuplicatedCode
@@ -225,6 +229,22 @@ class InstanceApiTest(TestCase):
                    )
         )
 
+    def test_shouldListEachValidStateOnceWhenTheGivenNextStateIsInvalid(self):
+        state2 = State(pk=2, label="state2")
+        state3 = State(pk=3, label="state3")
+        invalid_state = State(pk=4, label="state4")
+
+        available_approvals = [
+            TransitionApproval(transition=Transition(destination_state=state2)),
+            TransitionApproval(transition=Transition(destination_state=state3)),
+            TransitionApproval(transition=Transition(destination_state=state2)),
+        ]
+
+        assert_that(
+            calling(pick_approval).with_args(available_approvals, next_state=invalid_state),
+            raises(RiverException, "Invalid state is given\(state4\). Valid states is\(are\) state2,state3$")
+        )
+
     def test_shouldAllowCyclicTransitions(self):
         authorized_permission = PermissionObjectFactory()
 
@@ -494,6 +514,37 @@ class InstanceApiTest(TestCase):
             )
         )
 
+    def test_shouldCancelTheImpossibleFutureWithAFixedNumberOfQueries(self):
+        authorized_permission = PermissionObjectFactory()
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        chain = [RawState("chain_state%s" % index) for index in range(6)]
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build(), ]
+        flow_builder = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state1, chain[0], authorization_policies)
+        for source_state, destination_state in zip(chain, chain[1:]):
+            flow_builder = flow_builder.with_transition(source_state, destination_state, authorization_policies)
+        flow = flow_builder.build()
+
+        workflow_object = flow.objects[0]
+        approval = TransitionApproval.objects.select_related("transition").get(
+            object_id=workflow_object.pk, transition__source_state=flow.get_state(state1), transition__destination_state=flow.get_state(state2)
+        )
+
+        instance_workflow = workflow_object.river.my_field
+        with CaptureQueriesContext(connection) as queries:
+            instance_workflow.cancel_impossible_future(approval)
+        assert_that([query["sql"] for query in queries.captured_queries if "SAVEPOINT" not in query["sql"]], has_length(3))
+
+        approvals = TransitionApproval.objects.filter(workflow_object=workflow_object)
+        assert_that(approvals, has_approval(state1, state2, PENDING))
+        assert_that(approvals, has_approval(state1, chain[0], CANCELLED))
+        for source_state, destination_state in zip(chain, chain[1:]):
+            assert_that(approvals, has_approval(source_state, destination_state, CANCELLED))
+
     def test_shouldNotCancelDescendantsIfItIsPartOfPossibleFuture(self):
         authorized_permission = PermissionObjectFactory()
 
@@ -768,3 +819,176 @@ class InstanceApiTest(TestCase):
         approvals = TransitionApproval.objects.filter(workflow=flow.workflow, workflow_object=workflow_object)
 
         assert_that(approvals, has_approval(state3, final_state, PENDING))
+
+    def test_shouldInitializeApprovalsWithTheSameNumberOfQueriesRegardlessOfTheWorkflowSize(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user_group = GroupObjectFactory()
+
+        authorization_policies = [
+            AuthorizationPolicyBuilder().with_priority(0).with_permission(authorized_permission).build(),
+            AuthorizationPolicyBuilder().with_priority(1).with_group(authorized_user_group).build(),
+        ]
+
+        small_flow_builder = FlowBuilder("my_field", self.content_type).with_objects(0)
+        small_flow_builder.with_transition(RawState("small_state_0"), RawState("small_state_1"), authorization_policies)
+        small_flow_builder.build()
+
+        big_flow_builder = FlowBuilder("my_field", ContentType.objects.get_for_model(BasicTestModelWithoutAdmin)).with_objects(0)
+        for i in range(10):
+            big_flow_builder.with_transition(RawState("big_state_%s" % i), RawState("big_state_%s" % (i + 1)), authorization_policies)
+        big_flow = big_flow_builder.build()
+
+        BasicTestModel.objects.create()
+        BasicTestModelWithoutAdmin.objects.create()
+
+        with CaptureQueriesContext(connection) as small_flow_queries:
+            BasicTestModel.objects.create()
+
+        with CaptureQueriesContext(connection) as big_flow_queries:
+            workflow_object = BasicTestModelWithoutAdmin.objects.create()
+
+        assert_that(big_flow_queries.captured_queries, has_length(len(small_flow_queries.captured_queries)))
+
+        approvals = TransitionApproval.objects.filter(workflow=big_flow.workflow, workflow_object=workflow_object)
+        assert_that(approvals, has_length(20))
+        assert_that(Transition.objects.filter(workflow=big_flow.workflow, workflow_object=workflow_object), has_length(10))
+        assert_that(approvals.filter(permissions=authorized_permission), has_length(10))
+        assert_that(approvals.filter(groups=authorized_user_group), has_length(10))
+        for i in range(10):
+            assert_that(approvals, has_approval(RawState("big_state_%s" % i), RawState("big_state_%s" % (i + 1)), PENDING))
+        assert_that(list(approvals.values_list("transition__iteration", flat=True).distinct()), has_length(10))
+
+    def test_shouldRegenerateTheCycledPathWithTheSameNumberOfQueriesRegardlessOfTheWorkflowSize(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user_group = GroupObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission], groups=[authorized_user_group])
+
+        draft = RawState("draft")
+        in_review = RawState("in_review")
+        changes_requested = RawState("changes_requested")
+
+        authorization_policies = [
+            AuthorizationPolicyBuilder().with_priority(0).with_permission(authorized_permission).build(),
+            AuthorizationPolicyBuilder().with_priority(1).with_group(authorized_user_group).build(),
+        ]
+
+        def build_rework_flow(model, tail_length):
+            flow_builder = FlowBuilder("my_field", ContentType.objects.get_for_model(model)) \
+                .with_object_factory(lambda: model.objects.create()) \
+                .with_transition(draft, in_review, authorization_policies) \
+                .with_transition(in_review, changes_requested, authorization_policies) \
+                .with_transition(changes_requested, draft, authorization_policies)
+            previous_state = in_review
+            for i in range(tail_length):
+                next_state = RawState("published_%s_%s" % (tail_length, i))
+                flow_builder.with_transition(previous_state, next_state, authorization_policies)
+                previous_state = next_state
+            return flow_builder.build()
+
+        def request_changes(flow):
+            workflow_object = flow.objects[0]
+            for _ in range(2):
+                workflow_object.river.my_field.approve(as_user=authorized_user)
+            for _ in range(2):
+                workflow_object.river.my_field.approve(as_user=authorized_user, next_state=flow.get_state(changes_requested))
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(2):
+                    workflow_object.river.my_field.approve(as_user=authorized_user)
+            return queries
+
+        small_flow = build_rework_flow(BasicTestModel, 1)
+        big_flow = build_rework_flow(BasicTestModelWithoutAdmin, 10)
+
+        small_flow_queries = request_changes(small_flow)
+        big_flow_queries = request_changes(big_flow)
+
+        assert_that(big_flow_queries.captured_queries, has_length(len(small_flow_queries.captured_queries)))
+
+        workflow_object = big_flow.objects[0]
+        assert_that(workflow_object.my_field, equal_to(big_flow.get_state(draft)))
+
+        approvals = TransitionApproval.objects.filter(workflow=big_flow.workflow, workflow_object=workflow_object)
+        assert_that(approvals, has_approval(in_review, changes_requested, APPROVED, iteration=1, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(in_review, RawState("published_10_0"), CANCELLED, iteration=1, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(changes_requested, draft, APPROVED, iteration=2, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(draft, in_review, PENDING, iteration=3, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(in_review, changes_requested, PENDING, iteration=4, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(in_review, RawState("published_10_0"), PENDING, iteration=4, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(changes_requested, draft, PENDING, iteration=5, permissions=[authorized_permission]))
+        for i in range(1, 10):
+            assert_that(approvals, has_approval(RawState("published_10_%s" % (i - 1)), RawState("published_10_%s" % i), PENDING, iteration=4 + i, permissions=[authorized_permission]))
+
+        pending_transitions = Transition.objects.filter(workflow=big_flow.workflow, workflow_object=workflow_object, status=PENDING)
+        assert_that(pending_transitions, has_length(13))
+        assert_that(approvals.filter(transition__in=pending_transitions), has_length(26))
+        assert_that(approvals.filter(transition__in=pending_transitions, groups=authorized_user_group, priority=1), has_length(13))
+
+    def test_shouldKeepOnlyTheApprovalsWithTheLowestPriorityLeavingTheCurrentStateActionable(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+        state4 = RawState("state_4")
+
+        authorization_policies = [
+            AuthorizationPolicyBuilder().with_priority(0).with_permission(authorized_permission).build(),
+            AuthorizationPolicyBuilder().with_priority(1).with_permission(authorized_permission).build(),
+        ]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_transition(state3, state4, authorization_policies) \
+            .build()
+
+        workflow_object = flow.objects[0]
+
+        def actionable_approvals():
+            return TransitionApproval.objects.filter(workflow=flow.workflow, object_id=workflow_object.pk, actionable=True)
+
+        assert_that(actionable_approvals(), has_length(1))
+        assert_that(actionable_approvals(), has_approval(state1, state2, PENDING))
+        assert_that(actionable_approvals()[0].priority, equal_to(0))
+
+        workflow_object.river.my_field.approve(as_user=authorized_user)
+        assert_that(actionable_approvals(), has_length(1))
+        assert_that(actionable_approvals(), has_approval(state1, state2, PENDING))
+        assert_that(actionable_approvals()[0].priority, equal_to(1))
+
+        workflow_object.river.my_field.approve(as_user=authorized_user)
+        assert_that(actionable_approvals(), has_length(1))
+        assert_that(actionable_approvals(), has_approval(state2, state3, PENDING))
+        assert_that(actionable_approvals()[0].priority, equal_to(0))
+
+        workflow_object.river.my_field.jump_to(flow.get_state(state3))
+        assert_that(actionable_approvals(), has_length(1))
+        assert_that(actionable_approvals(), has_approval(state3, state4, PENDING))
+        assert_that(actionable_approvals()[0].priority, equal_to(0))
+
+    def test_shouldApproveWithinAFixedQueryBudget(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .build()
+
+        workflow_object = BasicTestModel.objects.get(pk=flow.objects[0].pk)
+        authorization_signature_cache.get(authorized_user)
+
+        instance_workflow = workflow_object.river.my_field
+        with self.assertNumQueries(15):
+            instance_workflow.approve(as_user=authorized_user)
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(state2)))
+
+        instance_workflow = workflow_object.river.my_field
+        with self.assertNumQueries(15):
+            instance_workflow.approve(as_user=authorized_user)
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(state3)))
@@ -0,0 +1,234 @@
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from hamcrest import assert_that, equal_to, has_length, raises, calling, has_item, greater_than
+
+from river.models import TransitionApproval, PENDING, CANCELLED, APPROVED, Transition, JUMPED
+from river.models.factories import UserObjectFactory, PermissionObjectFactory
+from river.tests.matchers import has_approval
+from river.tests.models import BasicTestModel
+from river.utils.exceptions import RiverException
+# noinspection PyMethodMayBeStatic,DuplicatedCode
+from rivertest.flowbuilder import FlowBuilder, AuthorizationPolicyBuilder, RawState
+
+
+class LazyApprovalsTest(TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(LazyApprovalsTest, self).__init__(*args, **kwargs)
+        self.content_type = ContentType.objects.get_for_model(BasicTestModel)
+
+    def test_shouldOnlyCreateTheTransitionsLeavingTheInitialState(self):
+        authorized_permission = PermissionObjectFactory()
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+        state4 = RawState("state_4")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build(), ]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_lazy_approvals() \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state1, state3, authorization_policies) \
+            .with_transition(state2, state4, authorization_policies) \
+            .build()
+
+        workflow_object = flow.objects[0]
+
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(state1)))
+
+        transitions = Transition.objects.filter(workflow=flow.workflow, workflow_object=workflow_object)
+        assert_that(transitions, has_length(2))
+
+        approvals = TransitionApproval.objects.filter(workflow=flow.workflow, workflow_object=workflow_object)
+        assert_that(approvals, has_length(2))
+        assert_that(approvals, has_approval(state1, state2, PENDING, iteration=0, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(state1, state3, PENDING, iteration=0, permissions=[authorized_permission]))
+
+    def test_shouldCreateTheNextFrontierWhenItTransits(self):
+        manager_permission = PermissionObjectFactory()
+        team_leader_permission = PermissionObjectFactory()
+
+        manager = UserObjectFactory(user_permissions=[manager_permission])
+        team_leader = UserObjectFactory(user_permissions=[team_leader_permission])
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+
+        authorization_policies = [
+            AuthorizationPolicyBuilder().with_priority(0).with_permission(team_leader_permission).build(),
+            AuthorizationPolicyBuilder().with_priority(1).with_permission(manager_permission).build(),
+        ]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_lazy_approvals() \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .build()
+
+        workflow_object = flow.objects[0]
+
+        assert_that(workflow_object.river.my_field.get_available_approvals(as_user=manager), has_length(0))
+        workflow_object.river.my_field.approve(as_user=team_leader)
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(state1)))
+        assert_that(Transition.objects.filter(workflow=flow.workflow, workflow_object=workflow_object), has_length(1))
+
+        workflow_object.river.my_field.approve(as_user=manager)
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(state2)))
+
+        approvals = TransitionApproval.objects.filter(workflow=flow.workflow, workflow_object=workflow_object)
+        assert_that(approvals, has_length(4))
+        assert_that(approvals, has_approval(state1, state2, APPROVED, iteration=0))
+        assert_that(approvals, has_approval(state2, state3, PENDING, iteration=1))
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=team_leader), has_item(workflow_object))
+
+        workflow_object.river.my_field.approve(as_user=team_leader)
+        workflow_object.river.my_field.approve(as_user=manager)
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(state3)))
+        assert_that(workflow_object.river.my_field.on_final_state, equal_to(True))
+        assert_that(Transition.objects.filter(workflow=flow.workflow, workflow_object=workflow_object), has_length(2))
+
+    def test_shouldAllowCyclicTransitions(self):
+        authorized_permission = PermissionObjectFactory()
+
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        cycle_state_1 = RawState("cycle_state_1")
+        cycle_state_2 = RawState("cycle_state_2")
+        cycle_state_3 = RawState("cycle_state_3")
+        off_the_cycle_state = RawState("off_the_cycle_state")
+        final_state = RawState("final_state")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build(), ]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_lazy_approvals() \
+            .with_transition(cycle_state_1, cycle_state_2, authorization_policies) \
+            .with_transition(cycle_state_2, cycle_state_3, authorization_policies) \
+            .with_transition(cycle_state_3, cycle_state_1, authorization_policies) \
+            .with_transition(cycle_state_3, off_the_cycle_state, authorization_policies) \
+            .with_transition(off_the_cycle_state, final_state, authorization_policies) \
+            .build()
+
+        workflow_object = flow.objects[0]
+
+        workflow_object.river.my_field.approve(as_user=authorized_user)
+        workflow_object.river.my_field.approve(as_user=authorized_user)
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(cycle_state_3)))
+
+        approvals = TransitionApproval.objects.filter(workflow=flow.workflow, workflow_object=workflow_object)
+        assert_that(approvals, has_length(4))
+        assert_that(approvals, has_approval(cycle_state_3, cycle_state_1, PENDING, iteration=2, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(cycle_state_3, off_the_cycle_state, PENDING, iteration=2, permissions=[authorized_permission]))
+
+        workflow_object.river.my_field.approve(as_user=authorized_user, next_state=flow.get_state(cycle_state_1))
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(cycle_state_1)))
+
+        approvals = TransitionApproval.objects.filter(workflow=flow.workflow, workflow_object=workflow_object)
+        assert_that(approvals, has_length(5))
+        assert_that(approvals, has_approval(cycle_state_3, cycle_state_1, APPROVED, iteration=2, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(cycle_state_3, off_the_cycle_state, CANCELLED, iteration=2, permissions=[authorized_permission]))
+        assert_that(approvals, has_approval(cycle_state_1, cycle_state_2, PENDING, iteration=3, permissions=[authorized_permission]))
+
+        workflow_object.river.my_field.approve(as_user=authorized_user)
+        workflow_object.river.my_field.approve(as_user=authorized_user)
+        workflow_object.river.my_field.approve(as_user=authorized_user, next_state=flow.get_state(off_the_cycle_state))
+        workflow_object.river.my_field.approve(as_user=authorized_user)
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(final_state)))
+
+    def test_shouldJumpToASpecificState(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+        state4 = RawState("state_4")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build(), ]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_lazy_approvals() \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_transition(state3, state4, authorization_policies) \
+            .build()
+
+        workflow_object = flow.objects[0]
+        jumped_approval = TransitionApproval.objects.select_related("transition").get(workflow=flow.workflow, object_id=workflow_object.pk)
+
+        workflow_object.river.my_field.jump_to(flow.get_state(state3))
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(state3)))
+
+        approvals = TransitionApproval.objects.filter(workflow=flow.workflow, workflow_object=workflow_object)
+        assert_that(approvals, has_length(2))
+        assert_that(approvals, has_approval(state1, state2, JUMPED))
+        assert_that(TransitionApproval.objects.get(pk=jumped_approval.pk).date_updated, greater_than(jumped_approval.date_updated))
+        assert_that(Transition.objects.get(pk=jumped_approval.transition_id).date_updated, greater_than(jumped_approval.transition.date_updated))
+        assert_that(approvals, has_approval(state3, state4, PENDING, iteration=2))
+
+        assert_that(
+            calling(workflow_object.river.my_field.jump_to).with_args(flow.get_state(state2)),
+            raises(RiverException, "This state is not available to be jumped in the future of this object")
+        )
+
+        workflow_object.river.my_field.approve(as_user=authorized_user)
+        assert_that(workflow_object.my_field, equal_to(flow.get_state(state4)))
+
+    def test_shouldInitializeTheFrontierOfObjectsCreatedInBulk(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build(), ]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_lazy_approvals() \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_objects(0) \
+            .build()
+
+        BasicTestModel.objects.bulk_create([BasicTestModel(), BasicTestModel(my_field=flow.get_state(state2))])
+        BasicTestModel.river.my_field.bulk_initialize(BasicTestModel.objects.all())
+
+        approvals = TransitionApproval.objects.filter(workflow=flow.workflow)
+        assert_that(approvals, has_length(2))
+        assert_that(approvals, has_approval(state1, state2, PENDING, iteration=0))
+        assert_that(approvals, has_approval(state2, state3, PENDING, iteration=1))
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=authorized_user), has_length(2))
+
+    def test_shouldJumpManyObjectsAtOnce(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+        state4 = RawState("state_4")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build(), ]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_lazy_approvals() \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_transition(state3, state4, authorization_policies) \
+            .with_objects(3) \
+            .build()
+
+        flow.objects[0].river.my_field.approve(as_user=authorized_user)
+        flow.objects[0].river.my_field.approve(as_user=authorized_user)
+        jumped_approvals = list(TransitionApproval.objects.select_related("transition").filter(workflow=flow.workflow, status=PENDING).exclude(object_id=flow.objects[0].pk))
+
+        jumped = BasicTestModel.river.my_field.jump_many(BasicTestModel.objects.all(), flow.get_state(state3))
+        assert_that(jumped, equal_to(2))
+
+        for workflow_object in flow.objects[1:]:
+            approvals = TransitionApproval.objects.filter(workflow=flow.workflow, workflow_object=workflow_object)
+            assert_that(approvals, has_length(2))
+            assert_that(approvals, has_approval(state1, state2, JUMPED))
+        for jumped_approval in jumped_approvals:
+            assert_that(TransitionApproval.objects.get(pk=jumped_approval.pk).date_updated, greater_than(jumped_approval.date_updated))
+            assert_that(Transition.objects.get(pk=jumped_approval.transition_id).date_updated, greater_than(jumped_approval.transition.date_updated))
+            assert_that(approvals, has_approval(state3, state4, PENDING, iteration=2))
+        assert_that(BasicTestModel.river.my_field.get_on_approval_objects(as_user=authorized_user), has_length(3))
@@ -0,0 +1,85 @@
+from unittest import skipUnless
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from hamcrest import assert_that, contains_string, all_of, is_not
+from mock import patch
+
+from river.models import TransitionApproval, Transition, PENDING
+from river.models.factories import PermissionObjectFactory, UserObjectFactory
+from river.models.hook import BEFORE
+from river.signals import ApproveSignal, TransitionSignal, OnCompleteSignal
+from river.tests.models import BasicTestModel
+# noinspection PyMethodMayBeStatic,DuplicatedCode
+from rivertest.flowbuilder import RawState, AuthorizationPolicyBuilder, FlowBuilder
+
+
+@skipUnless(connection.vendor == "sqlite", "The query plans are checked on SQLite")
+class QueryPlanTest(TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(QueryPlanTest, self).__init__(*args, **kwargs)
+        self.content_type = ContentType.objects.get_for_model(BasicTestModel)
+
+    def setUp(self):
+        self.authorized_permission = PermissionObjectFactory()
+        self.authorized_user = UserObjectFactory(user_permissions=[self.authorized_permission])
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(self.authorized_permission).build()]
+        self.flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .build()
+        self.workflow_object = self.flow.objects[0]
+
+    def test_shouldLookUpTheAvailableApprovalsThroughTheActionableIndex(self):
+        assert_that(BasicTestModel.river.my_field.get_available_approvals(as_user=self.authorized_user).explain(), contains_string("river_ta_actionable_idx"))
+
+    def test_shouldLookUpThePendingApprovalsOfAnObjectThroughThePendingIndex(self):
+        approvals = TransitionApproval.objects.filter(workflow=self.flow.workflow, object_id__in=[str(self.workflow_object.pk)], status=PENDING)
+        assert_that(approvals.explain(), contains_string("river_ta_pending_idx"))
+
+    def test_shouldLookUpThePeersOfAnApprovalThroughTheTransitionIndex(self):
+        approval = TransitionApproval.objects.filter(workflow=self.flow.workflow).first()
+        assert_that(approval.peers.order_by("priority").explain(), contains_string("river_ta_transition_idx"))
+
+    def test_shouldLookUpTheRecentApprovalThroughTheRecentIndex(self):
+        approvals = self.workflow_object.my_field_transition_approvals.filter(transaction_date__isnull=False).order_by("-transaction_date")
+        assert_that(approvals.explain(), contains_string("river_ta_recent_idx"))
+
+    def test_shouldLookUpTheTransitionsOfAnObjectThroughTheObjectIndex(self):
+        transitions = Transition.objects.filter(
+            workflow=self.flow.workflow,
+            workflow_object=self.workflow_object,
+            source_state=self.flow.get_state(RawState("state2")),
+            status=PENDING
+        )
+        assert_that(transitions.explain(), contains_string("river_tr_object_idx"))
+
+        transitions = Transition.objects.filter(workflow=self.flow.workflow, object_id=self.workflow_object.pk, status=PENDING, iteration__gte=0)
+        assert_that(transitions.explain(), contains_string("river_tr_object_idx"))
+
+    def test_shouldLookUpThePendingTransitionsOfAWorkflowThroughTheWorkflowIndex(self):
+        assert_that(Transition.objects.filter(workflow=self.flow.workflow, status=PENDING).explain(), contains_string("river_tr_workflow_idx"))
+
+    def test_shouldLookUpTheHooksThroughTheHookIndexes(self):
+        approval = TransitionApproval.objects.filter(workflow=self.flow.workflow).first()
+
+        on_approved_hooks = ApproveSignal(self.workflow_object, "my_field", approval, workflow=self.flow.workflow)._hooks(BEFORE)
+        assert_that(on_approved_hooks.explain(), contains_string("river_onapprovedhook_meta_idx"))
+
+        on_transit_hooks = TransitionSignal(True, self.workflow_object, "my_field", approval, workflow=self.flow.workflow)._hooks(BEFORE)
+        assert_that(on_transit_hooks.explain(), contains_string("river_ontransithook_meta_idx"))
+
+        on_complete_hooks = OnCompleteSignal(self.workflow_object, "my_field", workflow=self.flow.workflow, status=True)._hooks(BEFORE)
+        assert_that(on_complete_hooks.explain(), contains_string("river_oncompletehook_wf_idx"))
+
+    def test_shouldIndexTheWholeTableWhenPartialIndexesAreNotSupported(self):
+        index = next(index for index in TransitionApproval._meta.indexes if index.name == "river_ta_actionable_idx")
+        schema_editor = connection.schema_editor()
+        assert_that(str(index.create_sql(TransitionApproval, schema_editor)), contains_string("WHERE"))
+        with patch.object(connection.features, "supports_partial_indexes", False):
+            assert_that(str(index.create_sql(TransitionApproval, schema_editor)), all_of(contains_string("river_ta_actionable_idx"), is_not(contains_string("WHERE"))))
@@ -0,0 +1,57 @@
+from unittest import skipUnless
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from hamcrest import assert_that, equal_to, has_length
+
+from river.driver.orm_driver import OrmDriver
+from river.driver.sql_driver import SqlDriver
+from river.models.factories import PermissionObjectFactory, UserObjectFactory, GroupObjectFactory
+from river.tests.models import BasicTestModel
+# noinspection PyMethodMayBeStatic,DuplicatedCode
+from rivertest.flowbuilder import RawState, AuthorizationPolicyBuilder, FlowBuilder
+
+
+@skipUnless(connection.vendor in SqlDriver.vendors, "The SQL driver doesn't run on %s" % connection.vendor)
+class SqlDriverTest(TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(SqlDriverTest, self).__init__(*args, **kwargs)
+        self.content_type = ContentType.objects.get_for_model(BasicTestModel)
+
+    def test_shouldReturnTheSameApprovalsAsTheOrmDriver(self):
+        permission = PermissionObjectFactory()
+        group = GroupObjectFactory()
+        user_with_permission = UserObjectFactory(user_permissions=[permission])
+        user_in_group = UserObjectFactory(groups=[group])
+        authorized_user = UserObjectFactory(user_permissions=[permission], groups=[group])
+        unauthorized_user = UserObjectFactory()
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+        state4 = RawState("state4")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_permission(permission).build()]) \
+            .with_transition(state2, state3, [AuthorizationPolicyBuilder().with_group(group).build()]) \
+            .with_transition(state3, state4, [
+                AuthorizationPolicyBuilder().with_permission(permission).with_group(group).build(),
+                AuthorizationPolicyBuilder().with_priority(1).with_permission(permission).build(),
+            ]) \
+            .with_objects(3) \
+            .build()
+
+        flow.objects[1].river.my_field.approve(as_user=user_with_permission)
+        flow.objects[2].river.my_field.approve(as_user=user_with_permission)
+        flow.objects[2].river.my_field.approve(as_user=user_in_group)
+
+        orm_driver = OrmDriver(flow.workflow, BasicTestModel, "my_field")
+        sql_driver = SqlDriver(flow.workflow, BasicTestModel, "my_field")
+
+        for user in [user_with_permission, user_in_group, authorized_user, unauthorized_user]:
+            expected = set(orm_driver.get_available_approvals(as_user=user))
+            assert_that(set(sql_driver.get_available_approvals(as_user=user)), equal_to(expected))
+
+        assert_that(list(sql_driver.get_available_approvals(as_user=unauthorized_user)), has_length(0))
@@ -0,0 +1,47 @@
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from hamcrest import assert_that, equal_to, has_length, has_items
+
+from river.core import unifiedinbox as unified_inbox
+from river.models import TransitionApproval
+from river.models.factories import PermissionObjectFactory, UserObjectFactory
+from river.tests.models import BasicTestModel, ModelWithUUIDPrimaryKey
+# noinspection PyMethodMayBeStatic,DuplicatedCode
+from rivertest.flowbuilder import RawState, AuthorizationPolicyBuilder, FlowBuilder
+
+
+class UnifiedInboxTest(TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(UnifiedInboxTest, self).__init__(*args, **kwargs)
+        self.content_type = ContentType.objects.get_for_model(BasicTestModel)
+
+    def test_shouldListTheAvailableApprovalsAcrossAllTheRegisteredWorkflows(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+        unauthorized_user = UserObjectFactory()
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        integer_flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_objects(2) \
+            .build()
+        uuid_flow = FlowBuilder("status", ContentType.objects.get_for_model(ModelWithUUIDPrimaryKey)) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_object_factory(lambda: ModelWithUUIDPrimaryKey.objects.create()) \
+            .with_objects(2) \
+            .build()
+
+        approvals = unified_inbox.get_available_approvals(as_user=authorized_user, with_workflow_objects=True).order_by("-pk")
+        assert_that(approvals.count(), equal_to(4))
+        assert_that(unified_inbox.get_available_approvals(as_user=unauthorized_user), has_length(0))
+
+        with self.assertNumQueries(3):
+            page = list(approvals[1:])
+            workflow_objects = [approval.workflow_object for approval in page]
+        assert_that(page, equal_to(list(TransitionApproval.objects.order_by("-pk")[1:4])))
+        assert_that(workflow_objects, equal_to([approval.workflow_object for approval in TransitionApproval.objects.order_by("-pk")[1:4]]))
+        assert_that(integer_flow.objects + uuid_flow.objects, has_items(*workflow_objects))
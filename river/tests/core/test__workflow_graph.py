@@ -0,0 +1,146 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.test import TestCase
+from mock import patch
+from hamcrest import assert_that, equal_to, has_length, is_not, none, same_instance, contains_inanyorder
+
+from river.config import app_config
+from river.core.workflowgraph import workflow_graph_cache
+from river.models import TransitionMeta, Workflow, TransitionApprovalMeta
+from river.models.factories import PermissionObjectFactory, TransitionApprovalMetaFactory
+from river.tests.models import BasicTestModel
+# noinspection PyMethodMayBeStatic,DuplicatedCode
+from rivertest.flowbuilder import RawState, AuthorizationPolicyBuilder, FlowBuilder
+
+
+class WorkflowGraphTest(TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(WorkflowGraphTest, self).__init__(*args, **kwargs)
+        self.content_type = ContentType.objects.get_for_model(BasicTestModel)
+
+    def test_shouldCompileTheWorkflowDefinition(self):
+        authorized_permission = PermissionObjectFactory()
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+        state4 = RawState("state_4")
+
+        authorization_policies = [AuthorizationPolicyBuilder().with_permission(authorized_permission).build()]
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_transition(state2, state3, authorization_policies) \
+            .with_transition(state2, state4, authorization_policies) \
+            .build()
+
+        graph = workflow_graph_cache.get(self.content_type, "my_field")
+
+        assert_that(graph.workflow, equal_to(flow.workflow))
+        assert_that(graph.initial_state, equal_to(flow.get_state(state1)))
+        assert_that(graph.final_state_ids, contains_inanyorder(flow.get_state(state3).pk, flow.get_state(state4).pk))
+        assert_that(graph.levels, has_length(2))
+        assert_that(graph.depths[flow.get_state(state4).pk], equal_to(2))
+        assert_that(graph.outgoing[flow.get_state(state2).pk], has_length(2))
+        assert_that(graph.outgoing[flow.get_state(state1).pk][0].approval_metas[0].permission_ids, equal_to((authorized_permission.pk,)))
+
+    def test_shouldNotQueryTheDefinitionOnceItIsCompiled(self):
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+
+        FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2) \
+            .build()
+
+        graph = workflow_graph_cache.get(self.content_type, "my_field")
+        with self.assertNumQueries(1):
+            assert_that(workflow_graph_cache.get(self.content_type, "my_field"), same_instance(graph))
+
+    def test_shouldNotQueryTheDefinitionVersionWhenItIsSharedThroughTheCache(self):
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+
+        FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2) \
+            .build()
+
+        with patch.dict(app_config.settings, {"CACHE_ALIAS": "default"}):
+            graph = workflow_graph_cache.get(self.content_type, "my_field")
+            with self.assertNumQueries(0):
+                assert_that(workflow_graph_cache.get(self.content_type, "my_field"), same_instance(graph))
+                assert_that(BasicTestModel.river.my_field.initial_state, is_not(none()))
+        caches["default"].clear()
+
+    def test_shouldInvalidateTheGraphWhenTheDefinitionChanges(self):
+        authorized_permission = PermissionObjectFactory()
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2) \
+            .with_additional_state(state3) \
+            .build()
+
+        graph = workflow_graph_cache.get(self.content_type, "my_field")
+        assert_that(graph.final_state_ids, contains_inanyorder(flow.get_state(state2).pk))
+
+        transition_meta = TransitionMeta.objects.create(workflow=flow.workflow, source_state=flow.get_state(state2), destination_state=flow.get_state(state3))
+        graph = workflow_graph_cache.get(self.content_type, "my_field")
+        assert_that(graph.final_state_ids, contains_inanyorder(flow.get_state(state3).pk))
+
+        transition_approval_meta = TransitionApprovalMetaFactory.create(workflow=flow.workflow, transition_meta=transition_meta, priority=0)
+        transition_approval_meta.permissions.add(authorized_permission)
+        graph = workflow_graph_cache.get(self.content_type, "my_field")
+        assert_that(graph.outgoing[flow.get_state(state2).pk][0].approval_metas[0].permission_ids, equal_to((authorized_permission.pk,)))
+
+    def test_shouldBumpTheDefinitionVersionWhenTheDefinitionChanges(self):
+        authorized_permission = PermissionObjectFactory()
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2) \
+            .with_additional_state(state3) \
+            .build()
+
+        version = Workflow.objects.get(pk=flow.workflow.pk).version
+
+        transition_meta = TransitionMeta.objects.create(workflow=flow.workflow, source_state=flow.get_state(state2), destination_state=flow.get_state(state3))
+        assert_that(Workflow.objects.get(pk=flow.workflow.pk).version, equal_to(version + 1))
+
+        transition_approval_meta = TransitionApprovalMeta.objects.create(workflow=flow.workflow, transition_meta=transition_meta, priority=0)
+        assert_that(Workflow.objects.get(pk=flow.workflow.pk).version, equal_to(version + 2))
+
+        transition_approval_meta.permissions.add(authorized_permission)
+        assert_that(Workflow.objects.get(pk=flow.workflow.pk).version, equal_to(version + 3))
+
+        flow.workflow.save()
+        assert_that(flow.workflow.version, equal_to(version + 4))
+
+        flow.workflow.save(update_fields=["lazy_approvals"])
+        assert_that(flow.workflow.version, equal_to(version + 5))
+        assert_that(Workflow.objects.get(pk=flow.workflow.pk).version, equal_to(version + 5))
+
+    def test_shouldRebuildTheGraphWhenTheDefinitionIsChangedByAnotherProcess(self):
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+        state3 = RawState("state_3")
+
+        flow = FlowBuilder("my_field", self.content_type) \
+            .with_transition(state1, state2) \
+            .with_additional_state(state3) \
+            .build()
+
+        graph = workflow_graph_cache.get(self.content_type, "my_field")
+        assert_that(graph.final_state_ids, contains_inanyorder(flow.get_state(state2).pk))
+
+        TransitionMeta.objects.bulk_create([TransitionMeta(workflow=flow.workflow, source_state=flow.get_state(state2), destination_state=flow.get_state(state3))])
+        assert_that(workflow_graph_cache.get(self.content_type, "my_field"), same_instance(graph))
+
+        Workflow.objects.bump_version(flow.workflow.pk)
+        graph = workflow_graph_cache.get(self.content_type, "my_field")
+        assert_that(graph.final_state_ids, contains_inanyorder(flow.get_state(state3).pk))
@@ -3,7 +3,7 @@ from hamcrest import equal_to, assert_that, has_entry, none, all_of, has_key, ha
 
 from river.models import TransitionApproval
 from river.models.factories import PermissionObjectFactory, UserObjectFactory
-from river.models.hook import AFTER
+from river.models.hook import AFTER, BEFORE
 from river.tests.hooking.base_hooking_test import BaseHookingTest
 from river.tests.models import BasicTestModel
 # noinspection DuplicatedCode
@@ -144,3 +144,29 @@ class TransitionHooking(BaseHookingTest):
 
         output = self.get_output()
         assert_that(output, none())
+
+    def test_shouldInvokeCallbacksInTheOrderOfTheObjectsWhenTheyAreApprovedAtOnce(self):
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+        content_type = ContentType.objects.get_for_model(BasicTestModel)
+
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+
+        authorization_policies = [
+            AuthorizationPolicyBuilder().with_permission(authorized_permission).build(),
+        ]
+        flow = FlowBuilder("my_field", content_type) \
+            .with_transition(state1, state2, authorization_policies) \
+            .with_objects(3) \
+            .build()
+
+        workflow_objects = list(reversed(flow.objects))
+        self.hook_pre_transition(flow.workflow, flow.transitions_metas[0])
+        self.hook_post_transition(flow.workflow, flow.transitions_metas[0], workflow_object=workflow_objects[0])
+
+        BasicTestModel.river.my_field.approve_many(workflow_objects, as_user=authorized_user)
+
+        output = self.get_output()
+        assert_that([context["hook"]["when"] for context in output], equal_to([BEFORE, BEFORE, BEFORE, AFTER]))
+        assert_that([context["hook"]["payload"]["workflow_object"] for context in output], equal_to(workflow_objects + workflow_objects[:1]))
@@ -35,3 +35,8 @@ class ModelWithTwoStateFields(models.Model):
 class ModelWithStringPrimaryKey(models.Model):
     custom_pk = models.CharField(max_length=200, primary_key=True, default=uuid4())
     status = StateField()
+
+
+class ModelWithUUIDPrimaryKey(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid4)
+    status = StateField()
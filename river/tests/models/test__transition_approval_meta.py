@@ -3,6 +3,7 @@ from django.test import TestCase
 from hamcrest import assert_that, has_length, has_item, has_property, none
 
 from river.models import TransitionApproval, APPROVED, PENDING
+from river.models.factories import PermissionObjectFactory, UserObjectFactory
 from river.tests.models import BasicTestModel
 # noinspection PyMethodMayBeStatic
 from rivertest.flowbuilder import RawState, FlowBuilder, AuthorizationPolicyBuilder
@@ -49,3 +50,28 @@ class TransitionApprovalMetaModelTest(TestCase):
         flow.transitions_approval_metas[0].delete()
 
         assert_that(TransitionApproval.objects.filter(workflow=flow.workflow), has_length(0))
+
+    def test_shouldMakeTheNextApprovalActionableWhenThePrecedingOneIsDeleted(self):
+        content_type = ContentType.objects.get_for_model(BasicTestModel)
+        authorized_permission = PermissionObjectFactory()
+        authorized_user = UserObjectFactory(user_permissions=[authorized_permission])
+
+        state1 = RawState("state_1")
+        state2 = RawState("state_2")
+
+        flow = FlowBuilder("my_field", content_type) \
+            .with_transition(state1, state2, [
+                AuthorizationPolicyBuilder().with_priority(0).with_permission(PermissionObjectFactory()).build(),
+                AuthorizationPolicyBuilder().with_priority(1).with_permission(authorized_permission).build(),
+            ]) \
+            .build()
+
+        workflow_object = flow.objects[0]
+        assert_that(workflow_object.river.my_field.get_available_approvals(as_user=authorized_user), has_length(0))
+
+        flow.transitions_approval_metas[0].delete()
+
+        available_approvals = workflow_object.river.my_field.get_available_approvals(as_user=authorized_user)
+        assert_that(available_approvals, has_length(1))
+        assert_that(available_approvals, has_item(has_property("meta", flow.transitions_approval_metas[1])))
+        assert_that(available_approvals, has_item(has_property("actionable", True)))
@@ -1,15 +1,18 @@
 import os
 import sys
 from datetime import datetime, timedelta
+from importlib import import_module
 from unittest import skipUnless, skip
 from uuid import uuid4
 
 import django
 import six
+from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.db import connection
 from django.test.utils import override_settings
 from hamcrest import assert_that, equal_to, has_length, has_item, is_not, less_than
+from mock import patch
 
 from river.models import TransitionApproval, OnApprovedHook, Function, OnCompleteHook, OnTransitHook
 from river.models.factories import StateObjectFactory, WorkflowFactory, TransitionApprovalMetaFactory, PermissionObjectFactory, UserObjectFactory, \
@@ -17,6 +20,7 @@ from river.models.factories import StateObjectFactory, WorkflowFactory, Transiti
 from river.models.hook import BEFORE
 from river.tests.models import BasicTestModel
 from river.tests.models.factories import BasicTestModelObjectFactory
+from rivertest.flowbuilder import RawState, AuthorizationPolicyBuilder, FlowBuilder
 
 try:
     from StringIO import StringIO
@@ -787,3 +791,25 @@ class MigrationTests(TestCase):
             result = cur.execute("select object_id from river_oncompletehook where object_id='%s';" % workflow_object.model.pk).fetchall()
             assert_that(result, has_length(1))
             assert_that(result[0][0], equal_to(str(workflow_object.model.pk)))
+
+    def test__shouldMarkTheActionableApprovalsOfTheExistingObjectsPageByPage(self):
+        state1 = RawState("state1")
+        state2 = RawState("state2")
+        state3 = RawState("state3")
+
+        flow = FlowBuilder("my_field", ContentType.objects.get_for_model(BasicTestModel)) \
+            .with_transition(state1, state2, [AuthorizationPolicyBuilder().with_priority(0).build(), AuthorizationPolicyBuilder().with_priority(1).build()]) \
+            .with_transition(state2, state3, [AuthorizationPolicyBuilder().build()]) \
+            .with_objects(3) \
+            .build()
+        BasicTestModel.objects.filter(pk=flow.objects[0].pk).update(my_field=flow.get_state(state2))
+        TransitionApproval.objects.update(actionable=False)
+
+        migration = import_module("river.migrations.0004_transitionapproval_actionable")
+        with patch.object(migration, "CHUNK_SIZE", 2):
+            migration.mark_actionable_approvals(apps, None)
+
+        actionable_approvals = TransitionApproval.objects.filter(actionable=True)
+        assert_that(actionable_approvals, has_length(3))
+        assert_that(actionable_approvals.filter(object_id=flow.objects[0].pk, transition__source_state=flow.get_state(state2)), has_length(1))
+        assert_that(actionable_approvals.filter(transition__source_state=flow.get_state(state1), priority=0), has_length(2))
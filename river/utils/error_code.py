@@ -10,3 +10,4 @@ class ErrorCode(object):
     NO_STATE_FIELD = 8
     ALREADY_SKIPPED = 9
     STATE_IS_NOT_AVAILABLE_TO_BE_JUMPED = 10
+    INVALID_CURSOR = 11
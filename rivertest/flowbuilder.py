@@ -66,6 +66,7 @@ class FlowBuilder(object):
         self.additional_raw_states = []
         self.objects_count = 1
         self.object_factory = lambda: BasicTestModelObjectFactory().model
+        self.lazy_approvals = False
 
     def with_transition(self, source_state, destination_state, authorization_policies=None):
         self.raw_transitions.append(RawTransition(source_state, destination_state, authorization_policies))
@@ -83,6 +84,10 @@ class FlowBuilder(object):
         self.object_factory = factory
         return self
 
+    def with_lazy_approvals(self):
+        self.lazy_approvals = True
+        return self
+
     @transaction.atomic
     def build(self):
         workflow = None
@@ -97,7 +102,9 @@ class FlowBuilder(object):
         for raw_transition in self.raw_transitions:
             source_state, _ = State.objects.get_or_create(label=raw_transition.source_state.label)
             if not workflow:
-                workflow = Workflow.objects.create(field_name=self.field_name, content_type=self.content_type, initial_state=source_state)
+                workflow = Workflow.objects.create(
+                    field_name=self.field_name, content_type=self.content_type, initial_state=source_state, lazy_approvals=self.lazy_approvals
+                )
             destination_state, _ = State.objects.get_or_create(label=raw_transition.destination_state.label)
 
             states[source_state.label] = source_state